@@ -4,7 +4,7 @@ Intelligent Agent Router - Routes queries to appropriate agents based on content
 
 from typing import Dict, Any
 from app.core.llm import llm
-from app.agents.sales_agent import sales_agent
+from app.agents.sales_agent import sales_agent, is_direct_product_query
 from app.agents.doctor_agent import doctor_agent
 from langchain.schema import HumanMessage, SystemMessage
 
@@ -71,6 +71,12 @@ class AgentRouter:
         
     def route_query(self, query: str, session_id: str = "default") -> Dict[str, Any]:
         """Route a query to the appropriate agent."""
+        # Plain product requests can only be sales queries; skip the routing LLM call
+        if is_direct_product_query(query):
+            result = self.sales_agent.process_query(query, session_id)
+            result["routing_decision"] = "sales"
+            return result
+        
         try:
             # Use LLM to determine which agent should handle the query
             messages = [
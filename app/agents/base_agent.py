@@ -4,10 +4,17 @@ Base Agent class for Al Essa Kuwait - Contains common functionality for all agen
 
 from typing import Dict, List, Any, Optional
 from abc import ABC, abstractmethod
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Budgets for conversation state embedded in LLM prompts
+PROMPT_HISTORY_MESSAGES = 3
+PROMPT_MESSAGE_CHARS = 500
+PROMPT_PRODUCTS = 5
+PROMPT_PRODUCT_NAME_CHARS = 80
+
 class BaseAgent(ABC):
     """Base class for all chatbot agents with common functionality."""
     
@@ -23,23 +30,47 @@ class BaseAgent(ABC):
     
     def _build_context_prompt(self, query: str, history: List[Dict], user_context: Dict[str, Any]) -> str:
         """Build a context-aware prompt for the LLM."""
-        prompt = f"Current query: {query}\n\n"
+        parts = [f"Current query: {query}\n\n"]
         
         if history:
-            prompt += "Recent conversation history:\n"
+            parts.append("Recent conversation history:\n")
             for msg in history[-3:]:  # Last 3 messages for context
                 role = "User" if msg["role"] == "user" else "You"
-                prompt += f"{role}: {msg['content']}\n"
-            prompt += "\n"
+                parts.append(f"{role}: {msg['content']}\n")
+            parts.append("\n")
         
         if user_context:
-            prompt += "User context:\n"
-            for key, value in user_context.items():
-                prompt += f"- {key}: {value}\n"
-            prompt += "\n"
+            parts.append("User context:\n")
+            parts.extend(f"- {key}: {value}\n" for key, value in user_context.items())
+            parts.append("\n")
         
-        prompt += "Please respond naturally, considering the conversation history and user context."
-        return prompt
+        parts.append("Please respond naturally, considering the conversation history and user context.")
+        return "".join(parts)
+    
+    def _compact_history(self, history: List[Dict]) -> str:
+        """Recent conversation turns as compact JSON, each message truncated to the prompt budget."""
+        turns = []
+        for msg in history[-PROMPT_HISTORY_MESSAGES:]:
+            content = msg.get("content", "")
+            if len(content) > PROMPT_MESSAGE_CHARS:
+                content = content[:PROMPT_MESSAGE_CHARS] + "…[truncated]"
+            turns.append({"role": msg.get("role", ""), "content": content})
+        return json.dumps(turns, ensure_ascii=False, separators=(",", ":"))
+    
+    def _compact_products(self, products: List[Dict]) -> str:
+        """Products as compact JSON with only the fields the LLM needs to recommend them."""
+        return json.dumps(
+            [
+                {
+                    "name": product.get("name", "")[:PROMPT_PRODUCT_NAME_CHARS],
+                    "price": product.get("price"),
+                    "url": product.get("url", "")
+                }
+                for product in products[:PROMPT_PRODUCTS]
+            ],
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
     
     def _handle_conversation_memory(self, session_id: str, query: str, reply: str, 
                                    products: List[Dict], workflow_steps: List[str]) -> None:
@@ -83,19 +114,16 @@ class BaseAgent(ABC):
     
     def _deduplicate_products(self, products: List[Dict], limit: int = 5) -> List[Dict]:
         """Remove duplicate products based on name and limit results."""
-        unique_products = []
-        seen_names = set()
-        
+        # Insertion-ordered dict keeps the first product seen for each name
+        unique_products: Dict[str, Dict] = {}
         for product in products:
             product_name = product.get("name", "")
-            if product_name and product_name not in seen_names:
-                unique_products.append(product)
-                seen_names.add(product_name)
-                
+            if product_name:
+                unique_products.setdefault(product_name, product)
                 if len(unique_products) >= limit:
                     break
         
-        return unique_products
+        return list(unique_products.values())
     
     def _get_conversation_context(self, session_id: str) -> tuple[List[Dict], Dict[str, Any]]:
         """Get conversation history and user context."""
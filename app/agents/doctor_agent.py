@@ -2,10 +2,13 @@
 Doctor Agent for Al Essa Kuwait - Specialized in medical advice and product recommendations based on symptoms.
 """
 
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
 from app.core.llm import llm
 from app.tools.product_search import product_search_tool
 from app.agents.base_agent import BaseAgent
+from app.core.keywords import KeywordMatcher
 from langchain.schema import HumanMessage, SystemMessage
 
 DOCTOR_AGENT_PROMPT = """You are a knowledgeable virtual doctor for Al Essa Kuwait, specializing in providing medical advice and recommending appropriate medical products.
@@ -64,6 +67,79 @@ Based on symptoms, recommend appropriate products:
 
 Remember: Your primary goal is to help patients while ensuring their safety and encouraging professional medical care when appropriate!"""
 
+# Static decision prompts, built once at import instead of on every query
+DOCTOR_DECISION_SYSTEM_PROMPT = (
+    "You are a medical decision-making assistant. Respond with ONLY 'SEARCH' or 'CONVERSATION' "
+    "based on whether the patient needs medical product recommendations."
+)
+DOCTOR_DECISION_PROMPT_TEMPLATE = """Based on the patient query: "{query}"
+
+Should I search for medical products? Consider:
+- Are they describing symptoms or medical conditions?
+- Do they need medical advice with product recommendations?
+- Are they asking about treatment options or medical equipment?
+
+Respond with ONLY: "SEARCH" or "CONVERSATION"
+"""
+
+# User context signals as (context key, value, keywords); within a key the first listed match wins
+CONTEXT_SIGNALS = (
+    ("current_symptoms", "wrist/hand/arm issues", ("wrist", "hand", "arm")),
+    ("current_symptoms", "ankle/foot/leg issues", ("ankle", "foot", "leg")),
+    ("current_symptoms", "knee issues", ("knee", "leg")),
+    ("current_symptoms", "back issues", ("back", "spine")),
+    ("current_symptoms", "neck issues", ("neck", "cervical")),
+    ("current_symptoms", "headache", ("headache", "migraine")),
+    ("current_symptoms", "respiratory issues", ("breathing", "asthma", "cough")),
+    ("symptom_severity", "severe", ("severe", "bad", "terrible", "awful", "excruciating")),
+    ("symptom_severity", "moderate", ("moderate", "medium", "okay")),
+    ("symptom_severity", "mild", ("mild", "slight", "little")),
+    ("symptom_duration", "ongoing", ("days", "weeks", "months", "years")),
+    ("symptom_duration", "recent", ("just", "recently", "today", "yesterday")),
+)
+
+# Symptom keywords -> product searches, in priority order
+PRODUCT_QUERY_RULES = (
+    # Pain-related products
+    (("wrist", "hand", "arm"), ("wrist brace", "wrist splint", "hand brace", "ice pack")),
+    (("ankle", "foot", "leg"), ("ankle brace", "ankle support", "knee brace", "ice pack")),
+    (("knee", "leg"), ("knee brace", "knee support", "ice pack", "heating pad")),
+    (("shoulder", "arm"), ("shoulder brace", "arm sling", "ice pack")),
+    (("back", "spine"), ("back brace", "back support", "heating pad", "ice pack")),
+    (("neck", "cervical"), ("neck brace", "cervical collar", "heating pad")),
+    # Mobility products
+    (("walking", "mobility", "balance", "fall"), ("walker", "cane", "crutch", "wheelchair")),
+    (("weakness", "paralysis", "stroke"), ("wheelchair", "walker", "mobility aid")),
+    # Respiratory products
+    (("breathing", "asthma", "cough", "cold"), ("nebulizer", "inhaler", "humidifier")),
+    # Monitoring products
+    (("fever", "temperature"), ("thermometer",)),
+    (("blood pressure", "hypertension"), ("blood pressure monitor",)),
+    (("diabetes", "blood sugar"), ("glucose monitor",)),
+    # General pain relief
+    (("pain",), ("ice pack", "heating pad", "pain relief")),
+    # Scoliosis and spine-related products
+    (("scoliosis", "curved spine", "spine curve"),
+     ("back brace", "spinal brace", "posture support", "back support", "scoliosis brace")),
+)
+
+# One scan of the query finds every matching signal / rule (indices into the tables above)
+_context_matcher = KeywordMatcher({i: keywords for i, (_, _, keywords) in enumerate(CONTEXT_SIGNALS)})
+_product_query_matcher = KeywordMatcher({i: keywords for i, (keywords, _) in enumerate(PRODUCT_QUERY_RULES)})
+
+@lru_cache(maxsize=256)
+def _product_queries_for(symptom_lower: str) -> Tuple[str, ...]:
+    """Up to 3 distinct product searches for a lowercased symptom query (a tuple, so cached results stay immutable)."""
+    queries = []
+    for i in sorted(_product_query_matcher.groups(symptom_lower)):
+        queries.extend(PRODUCT_QUERY_RULES[i][1])
+    
+    # If no specific matches, try general medical equipment
+    if not queries:
+        queries.append("medical equipment")
+    
+    return tuple(dict.fromkeys(queries))[:3]  # Limit to 3 distinct search queries
+
 class DoctorAgent(BaseAgent):
     """Doctor agent for medical advice and product recommendations."""
     
@@ -94,27 +170,17 @@ class DoctorAgent(BaseAgent):
                 HumanMessage(content=context_prompt)
             ]
             
-            response = llm.invoke(messages)
-            llm_response = response.content
-            
             # Let the LLM decide if this is a symptom that needs product recommendations
-            decision_prompt = f"""
-            Based on the patient query: "{query}"
-            
-            Should I search for medical products? Consider:
-            - Are they describing symptoms or medical conditions?
-            - Do they need medical advice with product recommendations?
-            - Are they asking about treatment options or medical equipment?
-            
-            Respond with ONLY: "SEARCH" or "CONVERSATION"
-            """
+            decision_prompt = DOCTOR_DECISION_PROMPT_TEMPLATE.format(query=query)
             
             decision_messages = [
-                SystemMessage(content="You are a medical decision-making assistant. Respond with ONLY 'SEARCH' or 'CONVERSATION' based on whether the patient needs medical product recommendations."),
+                SystemMessage(content=DOCTOR_DECISION_SYSTEM_PROMPT),
                 HumanMessage(content=decision_prompt)
             ]
             
-            decision_response = llm.invoke(decision_messages)
+            # The conversational reply and the search decision are independent; run both LLM calls at once
+            response, decision_response = llm.batch([messages, decision_messages])
+            llm_response = response.content
             should_search = "SEARCH" in decision_response.content.upper()
             
             if should_search:
@@ -123,12 +189,15 @@ class DoctorAgent(BaseAgent):
                 # Generate product search queries based on symptoms
                 product_queries = self._generate_product_queries(query)
                 
-                # Search for relevant products
+                # Search for relevant products; the searches are network-bound, so run them concurrently
                 all_products = []
-                for search_query in product_queries:
-                    search_result = product_search_tool.invoke({"query": search_query})
-                    products_found = search_result.get("products", [])
-                    all_products.extend(products_found)
+                with ThreadPoolExecutor(max_workers=max(1, min(8, len(product_queries)))) as pool:
+                    search_results = pool.map(
+                        lambda search_query: product_search_tool.invoke({"query": search_query}),
+                        product_queries
+                    )
+                    for search_result in search_results:
+                        all_products.extend(search_result.get("products", []))
                 
                 # Remove duplicates and limit results
                 products = self._deduplicate_products(all_products, limit=5)
@@ -136,7 +205,7 @@ class DoctorAgent(BaseAgent):
                 # Generate medical advice with product recommendations
                 final_messages = [
                     SystemMessage(content=DOCTOR_AGENT_PROMPT),
-                    HumanMessage(content=f"Patient query: {query}\nConversation history: {history}\nRecommended products: {products}\nProvide medical advice with these product recommendations, including appropriate disclaimers and safety warnings. Reference previous context when relevant.")
+                    HumanMessage(content=f"Patient query: {query}\nConversation history: {self._compact_history(history)}\nRecommended products: {self._compact_products(products)}\nProvide medical advice with these product recommendations, including appropriate disclaimers and safety warnings. Reference previous context when relevant.")
                 ]
                 final_response = llm.invoke(final_messages)
                 reply = final_response.content
@@ -161,36 +230,10 @@ class DoctorAgent(BaseAgent):
         """Update user context based on the medical conversation."""
         context_updates = {}
         
-        # Extract medical conditions/symptoms
-        query_lower = query.lower()
-        if any(word in query_lower for word in ["wrist", "hand", "arm"]):
-            context_updates["current_symptoms"] = "wrist/hand/arm issues"
-        elif any(word in query_lower for word in ["ankle", "foot", "leg"]):
-            context_updates["current_symptoms"] = "ankle/foot/leg issues"
-        elif any(word in query_lower for word in ["knee", "leg"]):
-            context_updates["current_symptoms"] = "knee issues"
-        elif any(word in query_lower for word in ["back", "spine"]):
-            context_updates["current_symptoms"] = "back issues"
-        elif any(word in query_lower for word in ["neck", "cervical"]):
-            context_updates["current_symptoms"] = "neck issues"
-        elif any(word in query_lower for word in ["headache", "migraine"]):
-            context_updates["current_symptoms"] = "headache"
-        elif any(word in query_lower for word in ["breathing", "asthma", "cough"]):
-            context_updates["current_symptoms"] = "respiratory issues"
-        
-        # Extract severity
-        if any(word in query_lower for word in ["severe", "bad", "terrible", "awful", "excruciating"]):
-            context_updates["symptom_severity"] = "severe"
-        elif any(word in query_lower for word in ["moderate", "medium", "okay"]):
-            context_updates["symptom_severity"] = "moderate"
-        elif any(word in query_lower for word in ["mild", "slight", "little"]):
-            context_updates["symptom_severity"] = "mild"
-        
-        # Extract duration
-        if any(word in query_lower for word in ["days", "weeks", "months", "years"]):
-            context_updates["symptom_duration"] = "ongoing"
-        elif any(word in query_lower for word in ["just", "recently", "today", "yesterday"]):
-            context_updates["symptom_duration"] = "recent"
+        # Extract medical conditions/symptoms, severity and duration
+        for i in sorted(_context_matcher.groups(query.lower())):
+            key, value, _ = CONTEXT_SIGNALS[i]
+            context_updates.setdefault(key, value)
         
         if context_updates:
             from app.core.conversation_memory import conversation_memory
@@ -198,54 +241,7 @@ class DoctorAgent(BaseAgent):
     
     def _generate_product_queries(self, symptom_query: str) -> List[str]:
         """Generate product search queries based on symptoms."""
-        symptom_lower = symptom_query.lower()
-        queries = []
-        
-        # Pain-related products
-        if any(word in symptom_lower for word in ["wrist", "hand", "arm"]):
-            queries.extend(["wrist brace", "wrist splint", "hand brace", "ice pack"])
-        if any(word in symptom_lower for word in ["ankle", "foot", "leg"]):
-            queries.extend(["ankle brace", "ankle support", "knee brace", "ice pack"])
-        if any(word in symptom_lower for word in ["knee", "leg"]):
-            queries.extend(["knee brace", "knee support", "ice pack", "heating pad"])
-        if any(word in symptom_lower for word in ["shoulder", "arm"]):
-            queries.extend(["shoulder brace", "arm sling", "ice pack"])
-        if any(word in symptom_lower for word in ["back", "spine"]):
-            queries.extend(["back brace", "back support", "heating pad", "ice pack"])
-        if any(word in symptom_lower for word in ["neck", "cervical"]):
-            queries.extend(["neck brace", "cervical collar", "heating pad"])
-        
-        # Mobility products
-        if any(word in symptom_lower for word in ["walking", "mobility", "balance", "fall"]):
-            queries.extend(["walker", "cane", "crutch", "wheelchair"])
-        if any(word in symptom_lower for word in ["weakness", "paralysis", "stroke"]):
-            queries.extend(["wheelchair", "walker", "mobility aid"])
-        
-        # Respiratory products
-        if any(word in symptom_lower for word in ["breathing", "asthma", "cough", "cold"]):
-            queries.extend(["nebulizer", "inhaler", "humidifier"])
-        
-        # Monitoring products
-        if any(word in symptom_lower for word in ["fever", "temperature"]):
-            queries.append("thermometer")
-        if any(word in symptom_lower for word in ["blood pressure", "hypertension"]):
-            queries.append("blood pressure monitor")
-        if any(word in symptom_lower for word in ["diabetes", "blood sugar"]):
-            queries.append("glucose monitor")
-        
-        # General pain relief
-        if "pain" in symptom_lower:
-            queries.extend(["ice pack", "heating pad", "pain relief"])
-        
-        # Scoliosis and spine-related products
-        if any(word in symptom_lower for word in ["scoliosis", "curved spine", "spine curve"]):
-            queries.extend(["back brace", "spinal brace", "posture support", "back support", "scoliosis brace"])
-        
-        # If no specific matches, try general medical equipment
-        if not queries:
-            queries.append("medical equipment")
-        
-        return queries[:3]  # Limit to 3 search queries
+        return list(_product_queries_for(symptom_query.lower()))
 
 # Initialize doctor agent
 doctor_agent = DoctorAgent()
\ No newline at end of file
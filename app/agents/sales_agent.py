@@ -2,7 +2,8 @@
 Sales Agent for Al Essa Kuwait - Specialized in product sales and customer service.
 """
 
-from typing import Dict, List, Any
+import re
+from typing import Dict, List, Any, Tuple
 from app.core.llm import llm
 from app.tools.product_search import product_search_tool
 from app.tools.response_filter import response_filter_tool
@@ -13,6 +14,27 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Query signals; one precompiled alternation per signal instead of a Python loop of substring tests
+PRICE_QUERY_RE = re.compile(
+    r'less than|under|below|more than|over|above|between|budget|cheap|expensive|kwd|kd|dinar'
+)
+BUDGET_SIGNAL_RE = re.compile(r'cheap|budget|under|less than|kwd|dinar')
+URGENCY_SIGNAL_RE = re.compile(r'urgent|asap|immediately|today')
+
+# Plain product requests ("show me wheelchairs", "do you have Sunrise walkers?") always end in the
+# search plan, so they run it directly without the routing, reply and decision LLM calls
+DIRECT_PRODUCT_QUERY_RE = re.compile(
+    r"(?:(?:show me|do you have|looking for|i need|i want|find me)\s+)?"
+    r"(?:(?:an?|some|any)\s+)?"
+    r"(?:(?:sunrise|drive)\s+)?"
+    r"(?:wheelchairs?|walkers?|rollators?|crutch(?:es)?|canes?)"
+    r"\s*[?.!]?"
+)
+
+def is_direct_product_query(query: str) -> bool:
+    """Whether the query is a plain product request that needs no LLM planning."""
+    return DIRECT_PRODUCT_QUERY_RE.fullmatch(query.strip().lower()) is not None
+
 SALES_AGENT_PROMPT = """You are a professional sales representative for Al Essa Kuwait, specializing in medical equipment and home appliances.
 
 **🎯 YOUR ROLE**
@@ -59,6 +81,54 @@ SALES_AGENT_PROMPT = """You are a professional sales representative for Al Essa
 
 Remember: Your goal is to help customers make informed decisions that improve their lives!"""
 
+# Static prompt and reply text, built once at import instead of on every query
+SALES_DECISION_SYSTEM_PROMPT = (
+    "You are a decision-making assistant. Your job is to determine if a customer needs product information. "
+    "Respond with ONLY 'SEARCH' or 'CONVERSATION'."
+)
+SALES_DECISION_PROMPT_TEMPLATE = """Analyze this customer query: "{query}"
+
+Should I search for products? Answer SEARCH ONLY if:
+- Customer explicitly asks about specific products, brands, or models
+- Customer asks about pricing, costs, or availability of products
+- Customer asks "do you have [product]", "show me [product]", "looking for [product]"
+- Customer mentions specific medical equipment brands like "Sunrise", "Drive", etc.
+- Customer asks about cheapest, most expensive, or price comparisons of products
+- Customer clearly needs product recommendations or options
+
+Answer CONVERSATION if:
+- Customer says hello, asks how I am, or general greetings
+- Customer asks general questions not related to products
+- Customer asks about policies, services, or non-product topics
+- Customer makes general statements or comments
+- Query is ambiguous or could be either conversation or product-related
+- Customer uses generic terms that could refer to anything
+
+Be conservative - if in doubt, choose CONVERSATION.
+
+Respond with ONLY: "SEARCH" or "CONVERSATION"
+"""
+ALTERNATIVES_PROMPT_TEMPLATE = """The customer asked for: '{query}' but no products were found in the catalog.
+Based on your knowledge of medical equipment and our store, what alternative or related products should I suggest?
+Respond with a single search query or a comma-separated list of related product types/keywords.
+"""
+
+REPLY_PRODUCTS = 5
+PRODUCT_LINE_TEMPLATE = "{index}. {name} - {price} KWD\n   {url}"
+PRODUCTS_REPLY_TEMPLATE = (
+    "Here are the top options I found for your request:\n\n{product_list}\n\n"
+    "If you want more details about any of these, or need help choosing, just let me know!"
+)
+ALTERNATIVES_REPLY_TEMPLATE = (
+    "I'm sorry, I couldn't find any products matching your request. "
+    "However, here are some similar or related products you might be interested in (based on your request):\n\n{product_list}\n\n"
+    "If you want more details about any of these, or need help choosing, just let me know!"
+)
+NO_ALTERNATIVES_REPLY = (
+    "I'm sorry, I couldn't find any products matching your request, nor any suitable alternatives. "
+    "Please try rephrasing your query or ask about a different product."
+)
+
 class SalesAgent(BaseAgent):
     """Sales agent for product recommendations and customer service."""
     
@@ -80,6 +150,13 @@ class SalesAgent(BaseAgent):
             # Get conversation history for context
             history, user_context = self._get_conversation_context(session_id)
             
+            if is_direct_product_query(query):
+                workflow_steps.append("direct_plan")
+                reply, products = self._search_and_reply(query, history, workflow_steps)
+                self._handle_conversation_memory(session_id, query, reply, products, workflow_steps)
+                self._update_user_context(session_id, query, products)
+                return self._build_response(True, reply, products, workflow_steps)
+            
             # Build context-aware prompt
             context_prompt = self._build_context_prompt(query, history, user_context)
             
@@ -89,159 +166,25 @@ class SalesAgent(BaseAgent):
                 HumanMessage(content=context_prompt)
             ]
             
-            response = llm.invoke(messages)
-            llm_response = response.content
-            
             # Let the LLM decide if product search is needed
             # Ask the LLM to analyze the query and determine if products should be searched
-            decision_prompt = f"""
-            Analyze this customer query: \"{query}\"
-            
-            Should I search for products? Answer SEARCH ONLY if:
-            - Customer explicitly asks about specific products, brands, or models
-            - Customer asks about pricing, costs, or availability of products
-            - Customer asks \"do you have [product]\", \"show me [product]\", \"looking for [product]\"
-            - Customer mentions specific medical equipment brands like \"Sunrise\", \"Drive\", etc.
-            - Customer asks about cheapest, most expensive, or price comparisons of products
-            - Customer clearly needs product recommendations or options
-            
-            Answer CONVERSATION if:
-            - Customer says hello, asks how I am, or general greetings
-            - Customer asks general questions not related to products
-            - Customer asks about policies, services, or non-product topics
-            - Customer makes general statements or comments
-            - Query is ambiguous or could be either conversation or product-related
-            - Customer uses generic terms that could refer to anything
-            
-            Be conservative - if in doubt, choose CONVERSATION.
-            
-            Respond with ONLY: \"SEARCH\" or \"CONVERSATION\"
-            """
+            decision_prompt = SALES_DECISION_PROMPT_TEMPLATE.format(query=query)
             
             decision_messages = [
-                SystemMessage(content="You are a decision-making assistant. Your job is to determine if a customer needs product information. Respond with ONLY 'SEARCH' or 'CONVERSATION'."),
+                SystemMessage(content=SALES_DECISION_SYSTEM_PROMPT),
                 HumanMessage(content=decision_prompt)
             ]
             
-            decision_response = llm.invoke(decision_messages)
+            # The conversational reply and the search decision are independent; run both LLM calls at once
+            response, decision_response = llm.batch([messages, decision_messages])
+            llm_response = response.content
             should_search = "SEARCH" in decision_response.content.upper()
             
             # Trust the LLM's decision completely - no hardcoded fallback logic
             logger.info(f"LLM decision for query '{query}': {'SEARCH' if should_search else 'CONVERSATION'}")
             
             if should_search:
-                workflow_steps.extend(["sales_analysis", "product_search"])
-                
-                # Check if this is a price-based query
-                is_price_query = any(word in query.lower() for word in [
-                    'less than', 'under', 'below', 'more than', 'over', 'above',
-                    'between', 'budget', 'cheap', 'expensive', 'kwd', 'kd', 'dinar'
-                ])
-                
-                if is_price_query:
-                    # For price queries, we need to get products from conversation history first
-                    # or search for a general category, then filter by price
-                    workflow_steps.append("price_filtering")
-                    
-                    # Get previous products from conversation history
-                    previous_products = []
-                    if history:
-                        for msg in reversed(history):
-                            if msg.get("products"):
-                                previous_products = msg["products"]
-                                break
-                    
-                    if previous_products:
-                        # Filter previous products by price
-                        logger.info(f"Filtering {len(previous_products)} previous products by price")
-                        price_result = price_filter_tool.invoke({
-                            "products": previous_products,
-                            "query": query
-                        })
-                        products = price_result.get("products", [])
-                        constraints = price_result.get("constraints", {})
-                        logger.info(f"Price filtered to {len(products)} products with constraints: {constraints}")
-                    else:
-                        # No previous products, search for general category and filter
-                        logger.info(f"Price query with no previous products, searching for general category")
-                        # Try to extract a general category from the query
-                        general_search = "medical equipment"  # Default fallback
-                        search_result = product_search_tool.invoke({"query": general_search})
-                        all_products = search_result.get("products", [])
-                        
-                        # Filter by price
-                        price_result = price_filter_tool.invoke({
-                            "products": all_products,
-                            "query": query
-                        })
-                        products = price_result.get("products", [])
-                        logger.info(f"General search + price filter: {len(products)} products")
-                else:
-                    # Regular product search
-                    logger.info(f"Searching for products with query: {query}")
-                    search_result = product_search_tool.invoke({"query": query})
-                    products = search_result.get("products", [])
-                    logger.info(f"Found {len(products)} products for query: {query}")
-                
-                # If no products found, ask LLM for alternatives
-                if not products:
-                    alt_prompt = f"""
-                    The customer asked for: '{query}' but no products were found in the catalog.
-                    Based on your knowledge of medical equipment and our store, what alternative or related products should I suggest?
-                    Respond with a single search query or a comma-separated list of related product types/keywords.
-                    """
-                    alt_messages = [
-                        SystemMessage(content=SALES_AGENT_PROMPT),
-                        HumanMessage(content=alt_prompt)
-                    ]
-                    alt_response = llm.invoke(alt_messages)
-                    alt_query = alt_response.content.strip().split("\n")[0]
-                    logger.info(f"LLM suggested alternative search: {alt_query}")
-                    alt_search_result = product_search_tool.invoke({"query": alt_query})
-                    alt_products = alt_search_result.get("products", [])
-                    if alt_products:
-                        # Apply price filtering to alternative products if this was a price query
-                        if is_price_query:
-                            logger.info(f"Applying price filter to {len(alt_products)} alternative products")
-                            price_result = price_filter_tool.invoke({
-                                "products": alt_products,
-                                "query": query
-                            })
-                            alt_products = price_result.get("products", [])
-                            logger.info(f"Price filtered alternative products to {len(alt_products)}")
-                        
-                        product_lines = []
-                        for i, product in enumerate(alt_products[:5], 1):
-                            name = product.get("name", "Unknown Product")
-                            price = product.get("price", "N/A")
-                            url = product.get("url", "")
-                            product_lines.append(f"{i}. {name} - {price} KWD\n   {url}")
-                        product_list = "\n".join(product_lines)
-                        reply = (
-                            f"I'm sorry, I couldn't find any products matching your request. "
-                            f"However, here are some similar or related products you might be interested in (based on your request):\n\n{product_list}\n\n"
-                            "If you want more details about any of these, or need help choosing, just let me know!"
-                        )
-                        products = alt_products
-                    else:
-                        reply = (
-                            "I'm sorry, I couldn't find any products matching your request, nor any suitable alternatives. "
-                            "Please try rephrasing your query or ask about a different product."
-                        )
-                else:
-                    # Format the product list directly (no LLM hallucination)
-                    product_lines = []
-                    for i, product in enumerate(products[:5], 1):
-                        name = product.get("name", "Unknown Product")
-                        price = product.get("price", "N/A")
-                        url = product.get("url", "")
-                        product_lines.append(f"{i}. {name} - {price} KWD\n   {url}")
-                    product_list = "\n".join(product_lines)
-                    reply = (
-                        f"Here are the top options I found for your request:\n\n{product_list}\n\n"
-                        "If you want more details about any of these, or need help choosing, just let me know!"
-                    )
-                
+                reply, products = self._search_and_reply(query, history, workflow_steps)
             else:
                 # General sales conversation
                 workflow_steps.append("sales_conversation")
@@ -257,7 +200,103 @@ class SalesAgent(BaseAgent):
             error_msg = f"I'm sorry, I encountered an error: {str(e)}"
             return self._build_response(False, error_msg, [], ["error"], str(e))
     
-
+    def _search_and_reply(self, query: str, history: List[Dict], workflow_steps: List[str]) -> Tuple[str, List[Dict]]:
+        """Run the product search plan for a query and build the templated reply."""
+        workflow_steps.extend(["sales_analysis", "product_search"])
+        
+        # Check if this is a price-based query
+        query_lower = query.lower()
+        is_price_query = PRICE_QUERY_RE.search(query_lower) is not None
+        
+        if is_price_query:
+            # For price queries, we need to get products from conversation history first
+            # or search for a general category, then filter by price
+            workflow_steps.append("price_filtering")
+            
+            # Get previous products from conversation history
+            previous_products = []
+            if history:
+                for msg in reversed(history):
+                    if msg.get("products"):
+                        previous_products = msg["products"]
+                        break
+            
+            if previous_products:
+                # Filter previous products by price
+                logger.info(f"Filtering {len(previous_products)} previous products by price")
+                price_result = price_filter_tool.invoke({
+                    "products": previous_products,
+                    "query": query
+                })
+                products = price_result.get("products", [])
+                constraints = price_result.get("constraints", {})
+                logger.info(f"Price filtered to {len(products)} products with constraints: {constraints}")
+            else:
+                # No previous products, search for general category and filter
+                logger.info(f"Price query with no previous products, searching for general category")
+                # Try to extract a general category from the query
+                general_search = "medical equipment"  # Default fallback
+                search_result = product_search_tool.invoke({"query": general_search})
+                all_products = search_result.get("products", [])
+                
+                # Filter by price
+                price_result = price_filter_tool.invoke({
+                    "products": all_products,
+                    "query": query
+                })
+                products = price_result.get("products", [])
+                logger.info(f"General search + price filter: {len(products)} products")
+        else:
+            # Regular product search
+            logger.info(f"Searching for products with query: {query}")
+            search_result = product_search_tool.invoke({"query": query})
+            products = search_result.get("products", [])
+            logger.info(f"Found {len(products)} products for query: {query}")
+        
+        # If no products found, ask LLM for alternatives
+        if not products:
+            alt_prompt = ALTERNATIVES_PROMPT_TEMPLATE.format(query=query)
+            alt_messages = [
+                SystemMessage(content=SALES_AGENT_PROMPT),
+                HumanMessage(content=alt_prompt)
+            ]
+            alt_response = llm.invoke(alt_messages)
+            alt_query = alt_response.content.strip().split("\n")[0]
+            logger.info(f"LLM suggested alternative search: {alt_query}")
+            alt_search_result = product_search_tool.invoke({"query": alt_query})
+            alt_products = alt_search_result.get("products", [])
+            if alt_products:
+                # Apply price filtering to alternative products if this was a price query
+                if is_price_query:
+                    logger.info(f"Applying price filter to {len(alt_products)} alternative products")
+                    price_result = price_filter_tool.invoke({
+                        "products": alt_products,
+                        "query": query
+                    })
+                    alt_products = price_result.get("products", [])
+                    logger.info(f"Price filtered alternative products to {len(alt_products)}")
+                
+                reply = ALTERNATIVES_REPLY_TEMPLATE.format(product_list=self._format_product_list(alt_products))
+                products = alt_products
+            else:
+                reply = NO_ALTERNATIVES_REPLY
+        else:
+            # Format the product list directly (no LLM hallucination)
+            reply = PRODUCTS_REPLY_TEMPLATE.format(product_list=self._format_product_list(products))
+        
+        return reply, products
+    
+    def _format_product_list(self, products: List[Dict]) -> str:
+        """Numbered name/price/link lines for the top products (no LLM hallucination)."""
+        return "\n".join(
+            PRODUCT_LINE_TEMPLATE.format(
+                index=i,
+                name=product.get("name", "Unknown Product"),
+                price=product.get("price", "N/A"),
+                url=product.get("url", "")
+            )
+            for i, product in enumerate(products[:REPLY_PRODUCTS], 1)
+        )
     
     def _update_user_context(self, session_id: str, query: str, products: List[Dict]) -> None:
         """Update user context based on the conversation."""
@@ -276,11 +315,12 @@ class SalesAgent(BaseAgent):
                 context_updates["interested_in"] = "appliances"
         
         # Extract budget mentions
-        if any(word in query.lower() for word in ["cheap", "budget", "under", "less than", "kwd", "dinar"]):
+        query_lower = query.lower()
+        if BUDGET_SIGNAL_RE.search(query_lower):
             context_updates["budget_conscious"] = True
         
         # Extract urgency
-        if any(word in query.lower() for word in ["urgent", "asap", "immediately", "today"]):
+        if URGENCY_SIGNAL_RE.search(query_lower):
             context_updates["urgency"] = "high"
         
         if context_updates:
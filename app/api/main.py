@@ -1,28 +1,57 @@
 """
 FastAPI Chatbot with Agentic Workflow
 """
+import asyncio
+import orjson
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from app.agents.agent import chatbot_agent
-from app.tools.tools import get_product_prices_from_search
+from app.core.scraping import aget_product_prices_from_search, aclose_search_clients
 from app.core.analytics import analytics_manager, QueryMetrics
 from app.core.cache import cache_manager
+from app.core.conversation_memory import conversation_memory
 import time
 
+# Agents make blocking LLM and HTTP calls; run them on a shared pool off the event loop
+AGENT_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="agent")
+# Cap concurrent agent runs so bursts don't stampede the OpenAI rate limit
+MAX_CONCURRENT_AGENT_RUNS = 10
+# Created inside the serving loop on first use; a semaphore can only be awaited on one loop
+_agent_slots: Optional[asyncio.Semaphore] = None
+_agent_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_agent_slots() -> asyncio.Semaphore:
+    """The agent-run semaphore for the running event loop."""
+    global _agent_slots, _agent_slots_loop
+    loop = asyncio.get_running_loop()
+    if _agent_slots_loop is not loop:
+        _agent_slots = asyncio.Semaphore(MAX_CONCURRENT_AGENT_RUNS)
+        _agent_slots_loop = loop
+    return _agent_slots
+
+async def run_agent(query: str, session_id: str) -> Dict[str, Any]:
+    """Run the agent workflow in the shared pool without blocking other requests."""
+    async with _get_agent_slots():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(AGENT_POOL, chatbot_agent.process_query, query, session_id)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Alessa Med Virtual Health & Sales Assistant",
     description="A conversational chatbot that helps users find medical equipment using agentic workflows",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -34,6 +63,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def close_search_clients():
+    """Close the scraper's pooled async HTTP and OpenAI connections."""
+    await aclose_search_clients()
+
 @dataclass
 class ChatRequest:
     text: str
@@ -68,11 +102,14 @@ async def chat(request: Request):
     start_time = time.time()
     
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
     except:
         raise HTTPException(status_code=400, detail="Invalid JSON")
     
-    chat_request = ChatRequest(**data)
+    return await handle_chat(ChatRequest(**data), start_time)
+
+async def handle_chat(chat_request: ChatRequest, start_time: float) -> ChatResponse:
+    """Run the agent for a chat request and record analytics."""
     query = chat_request.text
     session_id = chat_request.session_id
     logger.info(f"Received /chat request: {query} (session: {session_id})")
@@ -82,7 +119,7 @@ async def chat(request: Request):
     
     try:
         # Process query with agent
-        agent_result = chatbot_agent.process_query(query, session_id)
+        agent_result = await run_agent(query, session_id)
         
         # Calculate response time
         response_time = time.time() - start_time
@@ -148,11 +185,34 @@ async def chat(request: Request):
             success=False
         )
 
+# Turns /chat-history returns by default; ?limit=N overrides it and ?limit=all returns every turn
+CHAT_HISTORY_MAX_TURNS = 10
+
+# Plain defs: conversation memory reads and writes JSON files, so FastAPI runs these in its threadpool
+@app.get("/chat-history/{session_id}")
+def chat_history(session_id: str, limit: Optional[str] = None):
+    """Recent conversation turns for a session, oldest first."""
+    if limit is None:
+        turns = CHAT_HISTORY_MAX_TURNS
+    elif limit == "all":
+        turns = None
+    elif limit.isdigit():
+        turns = int(limit)
+    else:
+        raise HTTPException(status_code=400, detail="limit must be a non-negative integer or 'all'")
+    return {"session_id": session_id, "history": conversation_memory.get_turns(session_id, turns)}
+
+@app.delete("/chat-history/{session_id}")
+def clear_chat_history(session_id: str):
+    """Delete a session's conversation history."""
+    conversation_memory.clear_session(session_id)
+    return {"message": f"Chat history cleared for session {session_id}"}
+
 @app.post("/scrape-prices")
 async def scrape_prices(request: ScrapePricesRequest):
     """Direct product search endpoint for testing and external use."""
     try:
-        result = get_product_prices_from_search(request.query)
+        result = await aget_product_prices_from_search(request.query)
         return {
             "success": True,
             "query": request.query,
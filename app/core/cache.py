@@ -107,6 +107,28 @@ class CacheManager:
         self._save_cache(self.llm_cache_file, self.llm_cache)
         logger.info(f"Cached LLM response")
     
+    def get_llm_cache_obj(self, prompt: str, model: str = "gpt-4o-mini") -> Optional[Any]:
+        """Get a cached, already-parsed LLM result (e.g. a dict decoded from JSON)."""
+        key = self._generate_key("llm_obj", prompt, model)
+        if key in self.llm_cache:
+            entry = self.llm_cache[key]
+            if not self._is_expired(entry["timestamp"], self.LLM_CACHE_TTL):
+                logger.info(f"Cache hit for parsed LLM response")
+                return entry["data"]
+            else:
+                del self.llm_cache[key]
+        return None
+    
+    def set_llm_cache_obj(self, prompt: str, obj: Any, model: str = "gpt-4o-mini") -> None:
+        """Cache a parsed LLM result so hits skip re-parsing the raw response."""
+        key = self._generate_key("llm_obj", prompt, model)
+        self.llm_cache[key] = {
+            "timestamp": time.time(),
+            "data": obj
+        }
+        self._save_cache(self.llm_cache_file, self.llm_cache)
+        logger.info(f"Cached parsed LLM response")
+    
     def get_session_cache(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get cached session data."""
         if session_id in self.session_cache:
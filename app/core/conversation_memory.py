@@ -108,6 +108,41 @@ class ConversationMemory:
         
         return history
     
+    def get_turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the last `limit` turns (all of them when None), each a user message paired with its reply."""
+        if limit is not None and limit <= 0:
+            return []
+        # Read-only: an unknown session id must not create (and keep) an empty session
+        session = self.active_sessions.get(session_id) or self._load_session(session_id)
+        if session is None:
+            return []
+        messages = session.messages
+        
+        # Walk back from the newest message to the user message that starts the oldest wanted turn
+        start = 0
+        if limit is not None:
+            user_messages = 0
+            for index in range(len(messages) - 1, -1, -1):
+                if messages[index].role == "user":
+                    user_messages += 1
+                    if user_messages == limit:
+                        start = index
+                        break
+        
+        turns = []
+        for message in messages[start:]:
+            if message.role == "user":
+                turns.append({"user": message.content, "assistant": None,
+                              "agent_type": None, "timestamp": message.timestamp})
+            elif turns and turns[-1]["assistant"] is None:
+                turns[-1]["assistant"] = message.content
+                turns[-1]["agent_type"] = message.agent_type
+            else:
+                # A reply with no user message of its own (e.g. a greeting) still gets a turn
+                turns.append({"user": None, "assistant": message.content,
+                              "agent_type": message.agent_type, "timestamp": message.timestamp})
+        return turns if limit is None else turns[-limit:]
+    
     def get_user_context(self, session_id: str) -> Dict[str, Any]:
         """Get user context from the session."""
         session = self.get_session(session_id)
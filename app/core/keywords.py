@@ -0,0 +1,42 @@
+"""
+Keyword matcher - finds which keyword groups occur in a text with a single regex scan.
+"""
+
+import re
+from typing import Dict, FrozenSet, Hashable, Iterable, Set
+
+class KeywordMatcher:
+    """Substring keyword groups matched in one pass over the text."""
+
+    def __init__(self, groups: Dict[Hashable, Iterable[str]]):
+        """
+        Initialize the matcher.
+
+        Args:
+            groups: Group id -> keywords; a group matches when any keyword is a substring of the text
+        """
+        keyword_groups: Dict[str, Set[Hashable]] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword, set()).add(group)
+
+        # A text containing a keyword contains every shorter keyword inside it as well
+        self._groups: Dict[str, FrozenSet[Hashable]] = {
+            keyword: frozenset(
+                group
+                for other, other_groups in keyword_groups.items() if other in keyword
+                for group in other_groups
+            )
+            for keyword in keyword_groups
+        }
+
+        # The lookahead reports the longest keyword at every position, so overlapping hits aren't lost
+        alternation = '|'.join(map(re.escape, sorted(keyword_groups, key=len, reverse=True))) or '(?!)'
+        self._pattern = re.compile(f'(?=({alternation}))')
+
+    def groups(self, text: str) -> Set[Hashable]:
+        """Ids of every group with a keyword in the (already lowercased) text."""
+        found: Set[Hashable] = set()
+        for match in self._pattern.finditer(text):
+            found |= self._groups[match.group(1)]
+        return found
@@ -11,14 +11,19 @@ except Exception as e:
     print(f"Error initializing LLM: {e}")
     llm = None
 
-def get_llm_response(query, history=None):
+def get_llm_response(query, history=None, system_prompt=""):
+    """
+    Call the LLM with an optional static instruction prefix, the conversation history and the query.
+    
+    Keeping static instructions in system_prompt (ahead of history) gives every call a
+    shared prompt prefix, which OpenAI caches automatically.
+    """
     logger.info("Calling OpenAI LLM...")
     # Format history as a string
-    history_str = ""
-    if history:
-        for turn in history:
-            history_str += f"User: {turn['user']}\nAssistant: {turn['bot']}\n"
-    prompt = f"{history_str}User: {query}\nAssistant:"
+    history_str = "".join(
+        f"User: {turn['user']}\nAssistant: {turn['bot']}\n" for turn in history or ()
+    )
+    prompt = f"{system_prompt}{history_str}User: {query}\nAssistant:"
     response = llm.invoke(prompt)
     # Only return the message content
     if isinstance(response, dict) and 'content' in response:
@@ -1,20 +1,27 @@
 import os
-import requests
+import json
+import asyncio
+import ssl
+import httpx
 from bs4 import BeautifulSoup
+import numpy as np
 import logging
 import re
 import time
-from typing import List, Dict, Optional, Any
-from requests.adapters import HTTPAdapter, Retry
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
 import openai
+from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # System prompt for product filtering and relevance checking
-PRODUCT_FILTER_PROMPT = """
+PRODUCT_FILTER_GUIDELINES = """
 You are an expert e-commerce product filter and formatter. Your job is to:
 
 1. **Assess Product Relevance**: Determine if a product matches the user's search intent
@@ -44,10 +51,125 @@ You are an expert e-commerce product filter and formatter. Your job is to:
    [View Product](https://example.com/product2)
 
 These are the most relevant options within your budget. Would you like more details about any specific model?"
+"""
 
+PRODUCT_FILTER_PROMPT = PRODUCT_FILTER_GUIDELINES + """
 Answer with "RELEVANT" if the product should be included, or "NOT_RELEVANT" if it should be filtered out.
 """
 
+# Product reply template, rendered locally instead of asking the LLM to format
+NO_PRODUCTS_REPLY = "No products found matching your search criteria."
+REPLY_MAX_PRODUCTS = 10
+REPLY_HEADER_TEMPLATE = "I found {count} relevant products for '{query}':\n\n"
+REPLY_ITEM_TEMPLATE = "{index}. **{name}** - {price} KWD\n   [View Product]({url})\n\n"
+REPLY_MORE_TEMPLATE = (
+    "... and {remaining} more products available. "
+    "Would you like me to narrow these down by brand or price range?"
+)
+REPLY_CLOSING = "These are the most relevant options I found. Would you like more details about any specific item?"
+
+# Maximum number of LLM relevance verdicts kept in memory per scraper
+RELEVANCE_CACHE_SIZE = 4096
+
+# lxml builds the tree in C; html.parser is pure Python and several times slower
+HTML_PARSER = "lxml"
+
+# Precompiled patterns used on every query / product
+_PRICE_RE = re.compile(r'[^0-9.]')
+_QUERY_RE = re.compile(r'[^a-zA-Z0-9 ]')
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_NON_PRODUCT_RE = re.compile(
+    r'downloadable|customer|account|login|register|cart|wishlist|compare|'
+    r'(?<!\w)search(?!\w)|menu|navigation|footer|header|sidebar|breadcrumb'
+)
+
+# Query words that say nothing about the product type (rules-first relevance)
+RELEVANCE_STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'for', 'with', 'and', 'or', 'of', 'in', 'on', 'to', 'me', 'my', 'i',
+    'show', 'find', 'need', 'want', 'looking', 'buy', 'get', 'some', 'any', 'please',
+    'under', 'below', 'over', 'above', 'less', 'more', 'than', 'between', 'around',
+    'cheap', 'cheapest', 'affordable', 'best', 'price', 'prices', 'kwd', 'kd', 'budget',
+})
+
+# Name words that mark an add-on rather than the item itself; these stay with the LLM
+ACCESSORY_TERMS = frozenset({
+    'accessory', 'cushion', 'cover', 'bag', 'battery', 'charger', 'part', 'replacement',
+    'spare', 'holder', 'strap', 'tray', 'pad', 'case', 'mount', 'adapter',
+})
+
+# Connection pool shared by page fetches; HTTP/2 multiplexes them over one connection
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+# Response statuses worth retrying with backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Search result HTML cache: default freshness when the site sends no max-age, and size bound
+PAGE_CACHE_TTL = 600
+PAGE_CACHE_SIZE = 256
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+# Whole search results memoized per normalized query; kept short so prices stay current
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_SIZE = 512
+
+# Al Essa Kuwait Magento structure - selectors tried in order
+PRODUCT_SELECTORS = (
+    '.product-item',
+    '.item.product',
+    '.product',
+    '[data-product-id]',
+    '.product-info'
+)
+NAME_SELECTORS = (
+    '.product-item-name a',
+    '.product-name a',
+    'h2.product-name a',
+    'h3 a',
+    'h2 a',
+    'a[href*="/product"]',
+    'a[href*="/default/catalog/product"]'
+)
+PRICE_SELECTORS = (
+    '.price-box .price',
+    '.price',
+    '.special-price .price',
+    '.regular-price .price',
+    '[data-price-type] .price',
+    '.price-wrapper .price'
+)
+VENDOR_SELECTORS = (
+    '.product-item-brand',
+    '.brand',
+    '.manufacturer',
+    '[data-brand]'
+)
+
+def price_value(price: Any) -> float:
+    """Numeric value of a product price (a float or text like "1,000.50 KWD"), or NaN."""
+    if isinstance(price, (int, float)):
+        return float(price)
+    try:
+        return float(_PRICE_RE.sub('', str(price)))
+    except ValueError:
+        return float('nan')
+
+def price_array(products: List[Dict[str, Any]]) -> np.ndarray:
+    """Prices of products as one float64 array; unparseable prices are NaN and fail every comparison."""
+    return np.fromiter((price_value(product.get('price')) for product in products),
+                       dtype=np.float64, count=len(products))
+
+@dataclass
+class CachedPage:
+    """A fetched page body plus the validators needed to revalidate it."""
+    text: str
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
 class ProductScraper:
     """Scraper for medical equipment products"""
     
@@ -82,22 +204,45 @@ class ProductScraper:
                 "Chrome/120.0.0.0 Safari/537.36"
             )
         
-        # Setup HTTP session with retries
-        self.session = requests.Session()
-        retries = Retry(
-            total=max_retries,
-            backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET"]
+        # One verified TLS context shared by the sync and async HTTP/2 clients
+        self.max_retries = max_retries
+        self.headers = {"User-Agent": user_agent}
+        self.ssl_context = ssl.create_default_context()
+        self.client = httpx.Client(
+            timeout=self.timeout,
+            headers=self.headers,
+            follow_redirects=True,
+            transport=httpx.HTTPTransport(
+                http2=True, verify=self.ssl_context, limits=HTTP_LIMITS, retries=max_retries
+            )
         )
-        adapter = HTTPAdapter(max_retries=retries)
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
-        self.session.headers.update({"User-Agent": user_agent})
+        
+        # LRU of fetched page HTML keyed on URL, honouring Cache-Control and ETag
+        self._page_cache: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._page_cache_lock = threading.Lock()
+        
+        # OpenAI client is created on first use and shared by all LLM calls
+        self._openai_client: Optional[OpenAI] = None
+        
+        # Async HTTP/2 and OpenAI clients, created on first use inside the serving event loop
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._async_openai_client: Optional[AsyncOpenAI] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # LRU of LLM relevance verdicts keyed on (normalized query, product URL)
+        self._relevance_cache: "OrderedDict[Tuple[str, str], bool]" = OrderedDict()
+        self._relevance_cache_lock = threading.Lock()
+
+    @property
+    def openai_client(self) -> OpenAI:
+        """Shared OpenAI client so every LLM call reuses the same connection pool."""
+        if self._openai_client is None:
+            self._openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._openai_client
 
     def build_search_url(self, query: str, page: int = 1) -> str:
         """Build search URL for Al Essa Kuwait website."""
-        search_term = re.sub(r'[^a-zA-Z0-9 ]', '', query).strip().replace(' ', '+')
+        search_term = _QUERY_RE.sub('', query).strip().replace(' ', '+')
         # Al Essa Kuwait uses Magento search format
         url = f"{self.base_url}/default/catalogsearch/result/?q={search_term}"
         if page > 1:
@@ -108,142 +253,223 @@ class ProductScraper:
         """Extract float price from string."""
         try:
             # Remove all non-numeric characters except decimal points
-            num = re.sub(r'[^0-9.]', '', price_str)
+            num = _PRICE_RE.sub('', price_str)
             return float(num) if num else None
         except (ValueError, TypeError):
             return None
 
+    def _retry_delay(self, attempt: int) -> float:
+        """Exponential backoff between retries of a throttled or failing response."""
+        return 0.5 * (2 ** attempt)
+
+    def _get_cached_page(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for a URL (fresh or stale), or None."""
+        with self._page_cache_lock:
+            entry = self._page_cache.get(url)
+            if entry is not None:
+                self._page_cache.move_to_end(url)
+            return entry
+
+    def _revalidation_headers(self, entry: Optional[CachedPage]) -> Dict[str, str]:
+        """Conditional request headers so an unchanged page comes back as a bodiless 304."""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _store_page(self, url: str, resp: httpx.Response, entry: Optional[CachedPage]) -> str:
+        """Resolve a response (including 304) to page HTML and cache it as Cache-Control allows."""
+        if resp.status_code == 304 and entry is not None:
+            text = entry.text
+        else:
+            resp.raise_for_status()
+            text = resp.text
+        
+        cache_control = resp.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            with self._page_cache_lock:
+                self._page_cache.pop(url, None)
+            return text
+        
+        if "no-cache" in cache_control:
+            ttl = 0
+        else:
+            match = _MAX_AGE_RE.search(cache_control)
+            ttl = int(match.group(1)) if match else PAGE_CACHE_TTL
+        
+        page = CachedPage(
+            text=text,
+            expires_at=time.time() + ttl,
+            etag=resp.headers.get("ETag") or (entry.etag if entry else None),
+            last_modified=resp.headers.get("Last-Modified") or (entry.last_modified if entry else None)
+        )
+        with self._page_cache_lock:
+            self._page_cache[url] = page
+            self._page_cache.move_to_end(url)
+            if len(self._page_cache) > PAGE_CACHE_SIZE:
+                self._page_cache.popitem(last=False)
+        return text
+
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch and parse a page."""
+        """Fetch and parse a page, served from the response cache while it is fresh."""
+        entry = self._get_cached_page(url)
+        if entry is not None and entry.fresh:
+            return BeautifulSoup(entry.text, HTML_PARSER)
+        
         try:
-            logger.info(f"Scraping product prices from: {url}")
-            resp = self.session.get(url, timeout=self.timeout, verify=False)
-            resp.raise_for_status()
-            return BeautifulSoup(resp.text, "html.parser")
-        except requests.RequestException as e:
-            logger.error(f"HTTP error for {url}: {e}")
+            logger.info("Scraping product prices from: %s", url)
+            headers = self._revalidation_headers(entry)
+            for attempt in range(self.max_retries + 1):
+                resp = self.client.get(url, headers=headers)
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+                time.sleep(self._retry_delay(attempt))
+            return BeautifulSoup(self._store_page(url, resp, entry), HTML_PARSER)
+        except httpx.HTTPError as e:
+            logger.error("HTTP error for %s: %s", url, e)
+            if entry is not None:
+                # Stale results beat no results when the site is down
+                return BeautifulSoup(entry.text, HTML_PARSER)
             return None
         except Exception as e:
-            logger.error(f"Parsing error for {url}: {e}")
+            logger.error("Parsing error for %s: %s", url, e)
             return None
 
+    def _bind_async_clients(self) -> None:
+        """Forget async clients opened on another event loop; their connections can't be used from this one."""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_loop = loop
+            self._aclient = None
+            self._async_openai_client = None
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """AsyncClient configured like the sync client, kept open across searches on the running loop."""
+        self._bind_async_clients()
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self.headers,
+                follow_redirects=True,
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True, verify=self.ssl_context, limits=HTTP_LIMITS, retries=self.max_retries
+                )
+            )
+        return self._aclient
+
+    def _async_openai(self) -> AsyncOpenAI:
+        """AsyncOpenAI client shared by the async LLM calls on the running loop."""
+        self._bind_async_clients()
+        if self._async_openai_client is None:
+            self._async_openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._async_openai_client
+
+    async def aclose(self) -> None:
+        """Close the async clients; the next async search opens new ones."""
+        aclient, openai_client = self._aclient, self._async_openai_client
+        self._aclient = self._async_openai_client = self._async_loop = None
+        if aclient is not None:
+            await aclient.aclose()
+        if openai_client is not None:
+            await openai_client.close()
+
+    async def afetch_page(self, client: httpx.AsyncClient, url: str) -> Optional[BeautifulSoup]:
+        """Fetch and parse a page using a shared httpx AsyncClient and the response cache."""
+        entry = self._get_cached_page(url)
+        if entry is not None and entry.fresh:
+            return BeautifulSoup(entry.text, HTML_PARSER)
+        
+        try:
+            logger.info("Scraping product prices from: %s", url)
+            headers = self._revalidation_headers(entry)
+            for attempt in range(self.max_retries + 1):
+                resp = await client.get(url, headers=headers)
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+                await asyncio.sleep(self._retry_delay(attempt))
+            return BeautifulSoup(self._store_page(url, resp, entry), HTML_PARSER)
+        except httpx.HTTPError as e:
+            logger.error("HTTP error for %s: %s", url, e)
+            if entry is not None:
+                # Stale results beat no results when the site is down
+                return BeautifulSoup(entry.text, HTML_PARSER)
+            return None
+        except Exception as e:
+            logger.error("Parsing error for %s: %s", url, e)
+            return None
+
+    @staticmethod
+    def _select_first(node: Any, selectors: Tuple[str, ...]) -> Optional[Any]:
+        """select_one over the selectors in priority order, stopping at the first match."""
+        for selector in selectors:
+            tag = node.select_one(selector)
+            if tag:
+                return tag
+        return None
+
     def parse_products(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """Parse products from Al Essa Kuwait Magento website."""
         products = []
         
-        # Al Essa Kuwait Magento structure - try multiple selectors
-        product_selectors = [
-            '.product-item',
-            '.item.product',
-            '.product',
-            '[data-product-id]',
-            '.product-info'
-        ]
-        
-        for selector in product_selectors:
+        product_elements = []
+        for selector in PRODUCT_SELECTORS:
             product_elements = soup.select(selector)
             if product_elements:
-                logger.info(f"Found {len(product_elements)} products using selector: {selector}")
+                logger.debug("Found %d products using selector: %s", len(product_elements), selector)
                 break
-        else:
+        if not product_elements:
             # Fallback: try to find any product-like elements
             product_elements = soup.select('[class*="product"]')
-            logger.info(f"Fallback: Found {len(product_elements)} product-like elements")
+            logger.debug("Fallback: Found %d product-like elements", len(product_elements))
         
         for product in product_elements:
             try:
-                # Try multiple name selectors for Magento structure
-                name_selectors = [
-                    '.product-item-name a',
-                    '.product-name a',
-                    'h2.product-name a',
-                    'h3 a',
-                    'h2 a',
-                    'a[href*="/product"]',
-                    'a[href*="/default/catalog/product"]'
-                ]
+                name_tag = self._select_first(product, NAME_SELECTORS)
+                if not name_tag:
+                    continue
                 
-                name_tag = None
-                for name_sel in name_selectors:
-                    name_tag = product.select_one(name_sel)
-                    if name_tag:
-                        break
+                name = name_tag.get_text(strip=True)
                 
-                # Try multiple price selectors for Magento
-                price_selectors = [
-                    '.price-box .price',
-                    '.price',
-                    '.special-price .price',
-                    '.regular-price .price',
-                    '[data-price-type] .price',
-                    '.price-wrapper .price'
-                ]
+                # Filter out non-product items (navigation, account links, etc.)
+                if not name or _NON_PRODUCT_RE.search(name.lower()):
+                    continue
+                
+                price_tag = self._select_first(product, PRICE_SELECTORS)
+                price_text = price_tag.get_text(strip=True) if price_tag else "0"
+                price = self.parse_price(price_text)
+                if price is None:
+                    continue
                 
-                price_tag = None
-                for price_sel in price_selectors:
-                    price_tag = product.select_one(price_sel)
-                    if price_tag:
-                        break
+                url = name_tag.get('href', '')
                 
-                if name_tag:
-                    name = name_tag.get_text(strip=True)
-                    price_text = price_tag.get_text(strip=True) if price_tag else "0"
-                    price = self.parse_price(price_text)
-                    url = name_tag.get('href', '')
-                    
-                    # Make URL absolute if relative
-                    if url and not url.startswith('http'):
-                        url = f"{self.base_url}{url}"
-                    
-                    # Extract vendor/brand if available
-                    vendor_selectors = [
-                        '.product-item-brand',
-                        '.brand',
-                        '.manufacturer',
-                        '[data-brand]'
-                    ]
-                    
-                    vendor = ""
-                    for vendor_sel in vendor_selectors:
-                        vendor_tag = product.select_one(vendor_sel)
-                        if vendor_tag:
-                            vendor = vendor_tag.get_text(strip=True)
-                            break
-                    
-                    # Filter out non-product items
-                    non_product_keywords = [
-                        'downloadable', 'my downloadable', 'customer', 'account', 'login', 
-                        'register', 'cart', 'wishlist', 'compare', 'search', 'menu',
-                        'navigation', 'footer', 'header', 'sidebar', 'breadcrumb'
-                    ]
-                    
-                    name_lower = name.lower()
-                    is_non_product = any(keyword in name_lower for keyword in non_product_keywords)
-                    
-                    # Also filter out items with 0 price that are likely placeholders
-                    is_placeholder = price == 0.0 and any(keyword in name_lower for keyword in ['downloadable', 'customer', 'account'])
-                    
-                    if name and price is not None and not is_non_product and not is_placeholder:
-                        products.append({
-                            'name': name,
-                            'price': price,
-                            'url': url,
-                            'vendor': vendor,
-                            'currency': 'KWD'
-                        })
+                # Make URL absolute if relative
+                if url and not url.startswith('http'):
+                    url = f"{self.base_url}{url}"
+                
+                # Extract vendor/brand if available
+                vendor_tag = self._select_first(product, VENDOR_SELECTORS)
+                vendor = vendor_tag.get_text(strip=True) if vendor_tag else ""
+                
+                products.append({
+                    'name': name,
+                    'price': price,
+                    'url': url,
+                    'vendor': vendor,
+                    'currency': 'KWD'
+                })
             except Exception as e:
-                logger.warning(f"Error parsing product: {e}")
+                logger.debug("Error parsing product: %s", e)
                 continue
         
-        logger.info(f"Successfully scraped {len(products)} products from Al Essa Kuwait.")
+        logger.info("Successfully scraped %d products from Al Essa Kuwait.", len(products))
         return products
 
-    def is_relevant_with_llm(self, query: str, product_data: Dict[str, Any]) -> bool:
-        """Check if product is relevant using OpenAI LLM with enhanced prompt."""
-        if not self.enable_llm_filtering:
-            return True
-            
-        prompt = f"""
+    def _build_relevance_prompt(self, query: str, product_data: Dict[str, Any]) -> str:
+        """Build the relevance-check prompt for a single product."""
+        return f"""
 {PRODUCT_FILTER_PROMPT}
 
 **User Query:** "{query}"
@@ -257,86 +483,310 @@ Based on the user's query and the product information above, should this product
 
 Answer only: RELEVANT or NOT_RELEVANT
 """
+
+    @staticmethod
+    def _relevance_terms(text: str) -> set:
+        """Lowercase word tokens reduced to a rough singular form."""
+        terms = set()
+        for word in _WORD_RE.findall(text.lower()):
+            if len(word) > 4 and word.endswith('ies'):
+                word = word[:-3] + 'y'
+            elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+                word = word[:-1]
+            terms.add(word)
+        return terms
+
+    def _rule_relevance(self, query: str, product_data: Dict[str, Any]) -> Optional[bool]:
+        """
+        Decide relevance without the LLM when the answer is obvious.
         
-        try:
-            # Use the new OpenAI API format
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        Returns True when every meaningful query term appears in the product name or
+        URL slug and the name does not look like an accessory; None when uncertain.
+        """
+        terms = {
+            term for term in self._relevance_terms(query)
+            if term not in RELEVANCE_STOP_WORDS and not term.isdigit()
+        }
+        if not terms:
+            return None
+        
+        name_terms = self._relevance_terms(product_data.get('name', ''))
+        slug = product_data.get('url', '').split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+        if not terms <= name_terms | self._relevance_terms(slug):
+            return None
+        if (name_terms & ACCESSORY_TERMS) - terms:
+            return None
+        return True
+
+    def _split_by_rules(self, query: str,
+                        products: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+        """Return (indices confirmed by rules, indices that still need the LLM)."""
+        confirmed, uncertain = [], []
+        for i, product in enumerate(products):
+            (confirmed if self._rule_relevance(query, product) else uncertain).append(i)
+        return confirmed, uncertain
+
+    def _relevance_key(self, query: str, product_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Cache key for a relevance verdict: whitespace/case-normalized query plus product URL."""
+        return " ".join(query.lower().split()), product_data.get('url', '')
+
+    def _get_cached_relevance(self, key: Tuple[str, str]) -> Optional[bool]:
+        """Return a cached relevance verdict, or None on a miss."""
+        with self._relevance_cache_lock:
+            verdict = self._relevance_cache.get(key)
+            if verdict is not None:
+                self._relevance_cache.move_to_end(key)
+            return verdict
+
+    def _set_cached_relevance(self, key: Tuple[str, str], verdict: bool) -> None:
+        """Store a relevance verdict, evicting the least recently used entry when full."""
+        if not key[1]:
+            return  # Without a URL the key would collide across products
+        with self._relevance_cache_lock:
+            self._relevance_cache[key] = verdict
+            self._relevance_cache.move_to_end(key)
+            if len(self._relevance_cache) > RELEVANCE_CACHE_SIZE:
+                self._relevance_cache.popitem(last=False)
+
+    def is_relevant_with_llm(self, query: str, product_data: Dict[str, Any]) -> bool:
+        """Check if product is relevant using OpenAI LLM with enhanced prompt."""
+        if not self.enable_llm_filtering:
+            return True
             
-            response = client.chat.completions.create(
+        key = self._relevance_key(query, product_data)
+        cached = self._get_cached_relevance(key)
+        if cached is not None:
+            return cached
+        
+        prompt = self._build_relevance_prompt(query, product_data)
+        
+        try:
+            response = self.openai_client.chat.completions.create(
                 model=self.llm_model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.0,
                 max_tokens=10
             )
             answer = response.choices[0].message.content.strip().upper()
-            return "RELEVANT" in answer
+            verdict = answer.startswith("RELEVANT")
+            self._set_cached_relevance(key, verdict)
+            return verdict
         except Exception as e:
-            logger.warning(f"LLM filtering failed: {e}")
+            logger.warning("LLM filtering failed: %s", e)
             return True  # Fallback: include by default
 
-    def format_products_with_llm(self, query: str, products: List[Dict[str, Any]]) -> str:
-        """Format products using OpenAI LLM for better presentation."""
-        if not products:
-            return "No products found matching your search criteria."
+    async def ais_relevant_with_llm(self, client: AsyncOpenAI, query: str, product_data: Dict[str, Any]) -> bool:
+        """Async variant of is_relevant_with_llm using a shared AsyncOpenAI client."""
+        if not self.enable_llm_filtering:
+            return True
         
-        # Prepare product list for LLM formatting
-        product_list = []
-        for i, product in enumerate(products[:10], 1):  # Limit to first 10 for formatting
-            product_list.append(f"{i}. {product['name']} - {product['price']} KWD - {product['url']}")
+        key = self._relevance_key(query, product_data)
+        cached = self._get_cached_relevance(key)
+        if cached is not None:
+            return cached
         
-        products_text = "\n".join(product_list)
+        prompt = self._build_relevance_prompt(query, product_data)
         
-        prompt = f"""
-{PRODUCT_FILTER_PROMPT}
+        try:
+            response = await client.chat.completions.create(
+                model=self.llm_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.0,
+                max_tokens=10
+            )
+            answer = response.choices[0].message.content.strip().upper()
+            verdict = answer.startswith("RELEVANT")
+            self._set_cached_relevance(key, verdict)
+            return verdict
+        except Exception as e:
+            logger.warning("LLM filtering failed: %s", e)
+            return True  # Fallback: include by default
+
+    def format_products(self, query: str, products: List[Dict[str, Any]]) -> str:
+        """
+        Render the product reply from the fixed markdown template.
+        
+        The reply is fully determined by the product list, so no LLM round-trip is needed.
+        """
+        if not products:
+            return NO_PRODUCTS_REPLY
+        
+        shown = products[:REPLY_MAX_PRODUCTS]
+        parts = [REPLY_HEADER_TEMPLATE.format(count=len(products), query=query)]
+        parts.extend(
+            REPLY_ITEM_TEMPLATE.format(index=i, name=product['name'], price=product['price'], url=product['url'])
+            for i, product in enumerate(shown, 1)
+        )
+        if len(products) > len(shown):
+            parts.append(REPLY_MORE_TEMPLATE.format(remaining=len(products) - len(shown)))
+        else:
+            parts.append(REPLY_CLOSING)
+        return ''.join(parts)
+
+    def _build_filter_and_format_prompt(self, query: str, products: List[Dict[str, Any]],
+                                        confirmed: frozenset = frozenset()) -> str:
+        """Build a single prompt that selects the relevant products among all candidates."""
+        product_lines = [
+            f"{i}. {product.get('name', '')} - {product.get('price', '')} KWD - {product.get('url', '')}"
+            + (" [matches query]" if i in confirmed else "")
+            for i, product in enumerate(products)
+        ]
+        products_text = "\n".join(product_lines)
+        
+        return f"""
+{PRODUCT_FILTER_GUIDELINES}
 
 **User Query:** "{query}"
 
-**Products Found:**
+**Candidate Products (index. name - price - url):**
 {products_text}
 
-**Total Products:** {len(products)}
+Decide which candidates are relevant to the user's query (candidates marked [matches query]
+are already known to be relevant and must be kept).
 
-Please format these products in a clear, organized way that includes:
-1. A summary of what was found
-2. Numbered list of products with names, prices, and clickable links
-3. A helpful closing message
-
-Format the response to be user-friendly and include proper markdown formatting for links.
+Respond with a JSON object only:
+{{"kept": [indices of relevant products]}}
 """
+
+    def _parse_filter_and_format_response(self, content: str, query: str,
+                                          products: List[Dict[str, Any]],
+                                          confirmed: frozenset = frozenset()) -> Tuple[List[Dict[str, Any]], str]:
+        """Map the fused LLM response back onto the candidate products."""
+        data = json.loads(content)
+        kept_indices = {i for i in data.get("kept", []) if isinstance(i, int) and 0 <= i < len(products)}
+        kept_indices |= confirmed
+        kept = [product for i, product in enumerate(products) if i in kept_indices]
+        
+        # Remember the verdicts so later per-product checks are free
+        for i, product in enumerate(products):
+            self._set_cached_relevance(self._relevance_key(query, product), i in kept_indices)
+        
+        return kept, self.format_products(query, kept)
+
+    def filter_and_format_with_llm(self, query: str,
+                                   products: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Filter products with a single LLM call and render the reply template.
+        
+        Replaces one relevance call per product plus a separate formatting call.
+        
+        Returns:
+            Tuple of (relevant products, formatted reply)
+        """
+        if not products:
+            return [], NO_PRODUCTS_REPLY
+        
+        confirmed, uncertain = self._split_by_rules(query, products)
+        if not uncertain:
+            # Rules settled every candidate; no LLM call needed
+            return products, self.format_products(query, products)
+        confirmed = frozenset(confirmed)
+        
+        prompt = self._build_filter_and_format_prompt(query, products, confirmed)
         
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            
-            response = client.chat.completions.create(
+            response = self.openai_client.chat.completions.create(
                 model=self.llm_model,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=500
+                temperature=0.0,
+                max_tokens=300,
+                response_format={"type": "json_object"}
+            )
+            return self._parse_filter_and_format_response(
+                response.choices[0].message.content, query, products, confirmed
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.warning(f"LLM formatting failed: {e}")
-            # Fallback to simple formatting
-            return self._format_products_simple(query, products)
+            logger.warning("LLM filter+format failed: %s", e)
+            return products, self.format_products(query, products)
+
+    async def afilter_and_format_with_llm(self, client: AsyncOpenAI, query: str,
+                                          products: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+        """Async variant of filter_and_format_with_llm using a shared AsyncOpenAI client."""
+        if not products:
+            return [], NO_PRODUCTS_REPLY
+        
+        confirmed, uncertain = self._split_by_rules(query, products)
+        if not uncertain:
+            # Rules settled every candidate; no LLM call needed
+            return products, self.format_products(query, products)
+        confirmed = frozenset(confirmed)
+        
+        prompt = self._build_filter_and_format_prompt(query, products, confirmed)
+        
+        try:
+            response = await client.chat.completions.create(
+                model=self.llm_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.0,
+                max_tokens=300,
+                response_format={"type": "json_object"}
+            )
+            return self._parse_filter_and_format_response(
+                response.choices[0].message.content, query, products, confirmed
+            )
+        except Exception as e:
+            logger.warning("LLM filter+format failed: %s", e)
+            return products, self.format_products(query, products)
 
     def _format_products_simple(self, query: str, products: List[Dict[str, Any]]) -> str:
         """Simple fallback formatting when LLM is not available."""
         total_products = len(products)
-        reply = f"I found {total_products} products matching your search for '{query}':\n\n"
+        parts = [f"I found {total_products} products matching your search for '{query}':\n\n"]
         
         # Show first 5 products in a numbered list
-        for i, product in enumerate(products[:5], 1):
-            reply += f"{i}. **{product['name']}** - {product['price']} KWD\n"
-            reply += f"   [View Product]({product['url']})\n\n"
+        parts.extend(
+            f"{i}. **{product['name']}** - {product['price']} KWD\n"
+            f"   [View Product]({product['url']})\n\n"
+            for i, product in enumerate(products[:5], 1)
+        )
         
         if total_products > 5:
-            reply += f"... and {total_products - 5} more products available. Would you like to see more specific options or filter by price range?"
+            parts.append(f"... and {total_products - 5} more products available. Would you like to see more specific options or filter by price range?")
         else:
-            reply += "These are all the products I found. Would you like more details about any specific item?"
+            parts.append("These are all the products I found. Would you like more details about any specific item?")
+        
+        return ''.join(parts)
+
+    def _collect_candidates(self, soups: List[Optional[BeautifulSoup]]) -> List[Dict[str, Any]]:
+        """Parse fetched result pages in order, stopping at the first missing or short page."""
+        candidates = []
+        seen_urls: set = set()
+        for soup in soups:
+            if not soup:
+                break
+                
+            products = self.parse_products(soup)
+            if not products:
+                break
+            
+            # Magento pagination repeats items; drop them before any LLM work
+            new_products = self._dedupe_by_url(products, seen_urls)
+            candidates.extend(new_products)
+            
+            # Stop if we got fewer new products than expected (might be last page)
+            if len(new_products) < 10:  # Assuming 10+ products per page
+                break
+        return candidates
+
+    def _dedupe_by_url(self, products: List[Dict[str, Any]], seen_urls: set) -> List[Dict[str, Any]]:
+        """Return products whose canonical URL has not been seen yet, recording the new ones."""
+        unique = []
+        for product in products:
+            key = product.get('url', '').split('?', 1)[0].rstrip('/')
+            if key:
+                if key in seen_urls:
+                    continue
+                seen_urls.add(key)
+            unique.append(product)
+        return unique
+
+    def _filter_by_max_price(self, products: List[Dict[str, Any]],
+                             max_price: Optional[float]) -> List[Dict[str, Any]]:
+        """Drop products above max_price with one vectorized comparison over all pages."""
+        if not max_price or not products:
+            return products
         
-        return reply
+        return [products[i] for i in np.flatnonzero(price_array(products) <= max_price)]
 
     def search_products(self, 
                        query: str, 
@@ -350,49 +800,97 @@ Format the response to be user-friendly and include proper markdown formatting f
             query: Search query
             max_pages: Maximum pages to search
             max_price: Maximum price filter
-            use_llm_formatting: Whether to use LLM for formatting
+            use_llm_formatting: Whether to batch relevance into one LLM call and use the full reply template
             
         Returns:
             Dictionary with 'products' list and 'formatted_reply' string
         """
-        all_products = []
+        urls = [self.build_search_url(query, page) for page in range(1, max_pages + 1)]
         
-        for page in range(1, max_pages + 1):
-            url = self.build_search_url(query, page)
-            soup = self.fetch_page(url)
-            
-            if not soup:
-                break
-                
-            products = self.parse_products(soup)
-            if not products:
-                break
-                
-            # Apply filters
-            filtered_products = []
-            for product in products:
-                # Price filter
-                if max_price and product.get('price', 0) > max_price:
-                    continue
-                    
-                # LLM relevance filter (if enabled)
-                if self.is_relevant_with_llm(query, product):
-                    filtered_products.append(product)
-            
-            all_products.extend(filtered_products)
-            
-            # Stop if we got fewer products than expected (might be last page)
-            if len(products) < 10:  # Assuming 10+ products per page
-                break
+        # Download every page in parallel; the client's pool is sized for it.
+        # A single page is fetched inline rather than paying for a worker thread.
+        if len(urls) <= 1:
+            soups = [self.fetch_page(url) for url in urls]
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(urls))) as executor:
+                soups = list(executor.map(self.fetch_page, urls))
         
-        logger.info(f"Total relevant items for '{query}': {len(all_products)}")
+        candidates = self._collect_candidates(soups)
+        candidates = self._filter_by_max_price(candidates, max_price)
         
-        # Format the response
         if use_llm_formatting and self.enable_llm_filtering:
-            formatted_reply = self.format_products_with_llm(query, all_products)
+            # One LLM call selects the relevant products; the reply is templated
+            all_products, formatted_reply = self.filter_and_format_with_llm(query, candidates)
         else:
+            # Rules first; only uncertain products go to the LLM relevance filter (if enabled)
+            all_products = [
+                product for product in candidates
+                if self._rule_relevance(query, product) or self.is_relevant_with_llm(query, product)
+            ]
             formatted_reply = self._format_products_simple(query, all_products)
         
+        logger.info("Total relevant items for '%s': %d", query, len(all_products))
+        
+        return {
+            'products': all_products,
+            'formatted_reply': formatted_reply
+        }
+
+    async def asearch_products(self,
+                               query: str,
+                               max_pages: int = 1,
+                               max_price: Optional[float] = None,
+                               use_llm_formatting: bool = True) -> Dict[str, Any]:
+        """
+        Async variant of search_products.
+        
+        All result pages are fetched concurrently and, when LLM filtering is
+        enabled, every relevance check is issued at once, so total latency is
+        close to the slowest single request instead of the sum of all of them.
+        
+        Args:
+            query: Search query
+            max_pages: Maximum pages to search
+            max_price: Maximum price filter
+            use_llm_formatting: Whether to batch relevance into one LLM call and use the full reply template
+            
+        Returns:
+            Dictionary with 'products' list and 'formatted_reply' string
+        """
+        urls = [self.build_search_url(query, page) for page in range(1, max_pages + 1)]
+        
+        # All pages are multiplexed over the scraper's pooled HTTP/2 connection
+        client = self._async_client()
+        soups = await asyncio.gather(*[self.afetch_page(client, url) for url in urls])
+        
+        candidates = self._collect_candidates(soups)
+        candidates = self._filter_by_max_price(candidates, max_price)
+        
+        if not self.enable_llm_filtering:
+            all_products = candidates
+            logger.info("Total relevant items for '%s': %d", query, len(all_products))
+            return {
+                'products': all_products,
+                'formatted_reply': self._format_products_simple(query, all_products)
+            }
+        
+        client = self._async_openai()
+        if use_llm_formatting:
+            # One LLM call selects the relevant products; the reply is templated
+            all_products, formatted_reply = await self.afilter_and_format_with_llm(client, query, candidates)
+        else:
+            # Rules first; one concurrent LLM request per uncertain candidate
+            confirmed, uncertain = self._split_by_rules(query, candidates)
+            verdicts = await asyncio.gather(
+                *[self.ais_relevant_with_llm(client, query, candidates[i]) for i in uncertain]
+            )
+            kept = set(confirmed)
+            kept.update(i for i, keep in zip(uncertain, verdicts) if keep)
+            all_products = [product for i, product in enumerate(candidates) if i in kept]
+            formatted_reply = self._format_products_simple(query, all_products)
+        
+        logger.info("Total relevant items for '%s': %d", query, len(all_products))
+        
         return {
             'products': all_products,
             'formatted_reply': formatted_reply
@@ -402,10 +900,86 @@ Format the response to be user-friendly and include proper markdown formatting f
 # Backward compatibility - create a default scraper instance
 _scraper = ProductScraper(enable_llm_filtering=False)  # Disable LLM filtering by default
 
+_search_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+# Searches currently being scraped; concurrent callers with the same key wait on the first one
+_inflight_searches: Dict[Tuple[str, int], Future] = {}
+# The same for async searches, whose scrape runs as a task on the event loop
+_ainflight_searches: Dict[Tuple[str, int], "asyncio.Task[Dict[str, Any]]"] = {}
+
+def _search_cache_key(query: str, max_pages: int) -> Tuple[str, int]:
+    """Cache key for a search; case and spacing don't change the results."""
+    return " ".join(query.lower().split()), max_pages
+
+def _get_cached_search(key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+    """Return a memoized search result that is still fresh, or None."""
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.time() >= expires_at:
+            del _search_cache[key]
+            return None
+        _search_cache.move_to_end(key)
+        return result
+
+def _store_search(key: Tuple[str, int], result: Dict[str, Any]) -> None:
+    """Memoize a search result; empty results may be a transient failure and are not kept."""
+    if not result.get('products'):
+        return
+    with _search_cache_lock:
+        _search_cache[key] = (time.time() + SEARCH_CACHE_TTL, result)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
 def get_product_prices_from_search(query: str, max_pages: int = 1) -> Dict[str, Any]:
     """
     Search for products by query using the SimpleScraper with enhanced formatting.
     
+    Repeated queries within SEARCH_CACHE_TTL seconds are answered from memory and
+    concurrent identical queries share one scrape; callers must treat the returned
+    dictionary as read-only.
+    
+    Args:
+        query: Search query
+        max_pages: Maximum pages to search
+        
+    Returns:
+        Dictionary with 'products' list and 'formatted_reply' string
+    """
+    key = _search_cache_key(query, max_pages)
+    result = _get_cached_search(key)
+    if result is not None:
+        return result
+    
+    # Single-flight: overlapping identical searches (e.g. from concurrent sessions) share one scrape
+    with _search_cache_lock:
+        inflight = _inflight_searches.get(key)
+        if inflight is None:
+            future = _inflight_searches[key] = Future()
+    if inflight is not None:
+        return inflight.result()
+    
+    try:
+        result = _scraper.search_products(query, max_pages=max_pages, use_llm_formatting=True)
+        _store_search(key, result)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _search_cache_lock:
+            del _inflight_searches[key]
+
+async def aget_product_prices_from_search(query: str, max_pages: int = 1) -> Dict[str, Any]:
+    """
+    Async variant of get_product_prices_from_search for use inside an event loop.
+    
+    Shares the memo with the sync variant; concurrent identical queries await one scrape.
+    
     Args:
         query: Search query
         max_pages: Maximum pages to search
@@ -413,7 +987,30 @@ def get_product_prices_from_search(query: str, max_pages: int = 1) -> Dict[str,
     Returns:
         Dictionary with 'products' list and 'formatted_reply' string
     """
-    return _scraper.search_products(query, max_pages=max_pages, use_llm_formatting=True)
+    key = _search_cache_key(query, max_pages)
+    result = _get_cached_search(key)
+    if result is not None:
+        return result
+    
+    # Single-flight: overlapping identical searches share one scrape task; shield keeps a
+    # cancelled caller (e.g. a dropped request) from cancelling it for the others
+    task = _ainflight_searches.get(key)
+    if task is None:
+        task = _ainflight_searches[key] = asyncio.ensure_future(_ascrape_search(key, query, max_pages))
+    return await asyncio.shield(task)
+
+async def _ascrape_search(key: Tuple[str, int], query: str, max_pages: int) -> Dict[str, Any]:
+    """Scrape and memoize one async search, then let later callers start their own."""
+    try:
+        result = await _scraper.asearch_products(query, max_pages=max_pages, use_llm_formatting=True)
+        _store_search(key, result)
+        return result
+    finally:
+        del _ainflight_searches[key]
+
+async def aclose_search_clients() -> None:
+    """Close the default scraper's async HTTP and OpenAI connections, e.g. at app shutdown."""
+    await _scraper.aclose()
 
 
 if __name__ == "__main__":
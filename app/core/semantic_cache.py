@@ -0,0 +1,153 @@
+"""
+Semantic cache - serves near-duplicate queries ("sunrise folding wheelchairs under 100 kwd"
+vs "the sunrise folding wheelchair under 100 KWD") from a previous answer instead of a new LLM call.
+"""
+
+import re
+import time
+import threading
+import logging
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\d+(?:\.\d+)?|\w+')
+
+# Filler words that don't change what is being asked for. Everything else - products, brands,
+# numbers, direction ("under"/"over") and negation ("with"/"without"/"no") - must match exactly,
+# since those change the meaning while barely moving the character n-gram embedding
+_FILLER_WORDS = frozenset({
+    'a', 'an', 'the', 'some', 'any', 'please', 'me', 'i', 'my', 'you', 'your', 'we', 'our',
+    'show', 'find', 'get', 'looking', 'look', 'want', 'need', 'do', 'does', 'have', 'has',
+    'is', 'are', 'can', 'could', 'would', 'there', 'what', 'which'
+})
+
+def _fold_plural(word: str) -> str:
+    """Fold a simple plural ("wheelchairs" -> "wheelchair")."""
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+class SemanticCache:
+    """Embedding-similarity cache keyed on normalized query text."""
+
+    def __init__(self,
+                 threshold: float = 0.95,
+                 ttl: int = 1800,
+                 capacity: int = 1024,
+                 n_features: int = 2 ** 12):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit between queries with the same content words
+            ttl: Seconds an entry stays valid
+            capacity: Maximum entries; the oldest is overwritten when full
+            n_features: Embedding dimension
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.capacity = capacity
+
+        # Character n-grams are robust to plurals and typos and need no fitting
+        self._vectorizer = HashingVectorizer(
+            analyzer='char_wb',
+            ngram_range=(3, 5),
+            n_features=n_features,
+            alternate_sign=False,
+            norm='l2'
+        )
+
+        # Row i of the (geometrically grown) matrix belongs to entry i
+        self._embeddings = np.zeros((min(16, capacity), n_features), dtype=np.float32)
+        self._keys: List[str] = []
+        self._signatures: List[FrozenSet[str]] = []
+        self._values: List[Any] = []
+        self._expires: List[float] = []
+        self._slots: Dict[str, int] = {}
+        # Latest slot per content-word signature; only these are candidates for a near-duplicate hit
+        self._signature_slots: Dict[FrozenSet[str], int] = {}
+        self._next_evict = 0
+        self._lock = threading.Lock()
+
+    def _normalize(self, text: str) -> str:
+        """Lowercase, collapse whitespace and fold simple plurals ("wheelchairs" -> "wheelchair")."""
+        return " ".join(_fold_plural(word) for word in text.lower().split())
+
+    def _signature(self, key: str) -> FrozenSet[str]:
+        """Content words of a normalized query; near-duplicates must have exactly the same set."""
+        return frozenset(
+            _fold_plural(token) for token in _TOKEN_RE.findall(key) if token not in _FILLER_WORDS
+        )
+
+    def embed(self, text: str) -> np.ndarray:
+        """L2-normalized float32 embedding of the normalized text."""
+        return self._vectorizer.transform([self._normalize(text)]).toarray()[0].astype(np.float32)
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return the value cached for a live query with the same content words, or None."""
+        key = self._normalize(text)
+        signature = self._signature(key)
+
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._signature_slots.get(signature)
+                if slot is None:
+                    return None
+                similarity = float(self._embeddings[slot] @ self.embed(key))
+                if similarity < self.threshold:
+                    return None
+                logger.info("Semantic cache hit: '%s' ~ '%s' (%.3f)", key, self._keys[slot], similarity)
+            if time.time() > self._expires[slot]:
+                return None
+            return self._values[slot]
+
+    def set(self, text: str, value: Any) -> None:
+        """Cache a value under the text's embedding."""
+        key = self._normalize(text)
+        embedding = self.embed(key)
+        signature = self._signature(key)
+        expires = time.time() + self.ttl
+
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                if len(self._keys) < self.capacity:
+                    slot = len(self._keys)
+                    if slot == self._embeddings.shape[0]:
+                        grown = np.zeros((min(2 * slot, self.capacity), self._embeddings.shape[1]), dtype=np.float32)
+                        grown[:slot] = self._embeddings
+                        self._embeddings = grown
+                    self._keys.append(key)
+                    self._signatures.append(signature)
+                    self._values.append(value)
+                    self._expires.append(expires)
+                else:
+                    # Full: overwrite entries oldest-first
+                    slot = self._next_evict
+                    self._next_evict = (slot + 1) % self.capacity
+                    del self._slots[self._keys[slot]]
+                    if self._signature_slots.get(self._signatures[slot]) == slot:
+                        del self._signature_slots[self._signatures[slot]]
+                self._slots[key] = slot
+
+            self._embeddings[slot] = embedding
+            self._keys[slot] = key
+            self._signatures[slot] = signature
+            self._values[slot] = value
+            self._expires[slot] = expires
+            self._signature_slots[signature] = slot
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._embeddings[:] = 0
+            self._keys.clear()
+            self._signatures.clear()
+            self._values.clear()
+            self._expires.clear()
+            self._slots.clear()
+            self._signature_slots.clear()
+            self._next_evict = 0
@@ -3,33 +3,60 @@ Enhanced Product Search Tool - Advanced search with semantic matching, filtering
 """
 
 from langchain.tools import tool
+import json
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-from app.core.scraping import get_product_prices_from_search
+from app.core.scraping import get_product_prices_from_search, price_array
 from app.core.cache import cache_manager
+from app.core.semantic_cache import SemanticCache
 from app.core.llm import llm
 from langchain.schema import HumanMessage, SystemMessage
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer
 
 logger = logging.getLogger(__name__)
 
+# Intent responses are strict JSON; one decoder instance serves every parse
+_intent_decoder = json.JSONDecoder()
+
+INTENT_SYSTEM_PROMPT = "You are a search intent analyzer. Extract structured information from user queries."
+
+# Cap concurrent intent LLM calls so bursts don't trip OpenAI rate limits
+MAX_CONCURRENT_LLM_CALLS = 5
+
+# Sync searches extract intent here while the calling thread scrapes; the pool size caps LLM concurrency too
+_intent_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_LLM_CALLS, thread_name_prefix="search-intent")
+
+# Queries this short carry no brand/price/feature signal worth an LLM call
+KEYWORD_QUERY_MAX_WORDS = 2
+
+# Weights of the intent-based relevance and semantic similarity in the combined score
+RELEVANCE_WEIGHT = 0.7
+SEMANTIC_WEIGHT = 0.3
+
 class EnhancedProductSearch:
     """Enhanced product search with semantic matching and relevance scoring."""
     
     def __init__(self):
         """Initialize the enhanced search."""
-        self.vectorizer = TfidfVectorizer(
+        # Stateless hashing: nothing to fit, and rows come out L2-normalized
+        self.vectorizer = HashingVectorizer(
+            n_features=2 ** 14,
             stop_words='english',
             ngram_range=(1, 2),
-            max_features=1000
+            alternate_sign=False,
+            norm='l2'
         )
         
-    def _extract_search_intent(self, query: str) -> Dict[str, Any]:
-        """Extract search intent and parameters from query."""
-        intent_prompt = f"""
+        # Near-duplicate queries reuse earlier intents and results
+        self.intent_cache = SemanticCache(ttl=cache_manager.LLM_CACHE_TTL)
+        self.results_cache = SemanticCache(ttl=cache_manager.PRODUCT_CACHE_TTL)
+        
+    def _build_intent_prompt(self, query: str) -> str:
+        """Build the intent extraction prompt for a query."""
+        return f"""
         Analyze this search query: "{query}"
         
         Extract the following information:
@@ -45,188 +72,231 @@ class EnhancedProductSearch:
             "category": "string",
             "product_type": "string", 
             "brands": ["list"],
-            "price_range": {{"min": float, "max": float}},
+            "price_range": {{"min": number, "max": number or null}},
             "features": ["list"],
             "urgency": "string"
         }}
+        
+        Respond with strict JSON only. Use null for "max" when there is no upper price limit.
         """
+    
+    def _cached_intent(self, query: str, intent_prompt: str) -> Optional[Dict[str, Any]]:
+        """Return an intent from the semantic or exact LLM cache, or None."""
+        similar_intent = self.intent_cache.get(query)
+        if similar_intent is not None:
+            return similar_intent
+        
+        # Stored already parsed, so a hit is a lookup with no JSON decode
+        cached_intent = cache_manager.get_llm_cache_obj(intent_prompt)
+        if cached_intent is not None:
+            self.intent_cache.set(query, cached_intent)
+        return cached_intent
+    
+    def _fallback_intent(self, query: str) -> Dict[str, Any]:
+        """Basic intent used when the LLM response cannot be parsed."""
+        return {
+            "category": "general",
+            "product_type": query.lower(),
+            "brands": [],
+            "price_range": {"min": 0, "max": float('inf')},
+            "features": [],
+            "urgency": "medium"
+        }
+    
+    def _is_keyword_query(self, query: str) -> bool:
+        """True for short, number-free queries whose intent is just the product type."""
+        return len(query.split()) <= KEYWORD_QUERY_MAX_WORDS and not any(c.isdigit() for c in query)
+    
+    def _intent_from_response(self, query: str, intent_prompt: str, intent_data: str) -> Dict[str, Any]:
+        """Parse and cache an LLM intent response, falling back to basic extraction."""
+        try:
+            intent = self._parse_intent(intent_data)
+        except (json.JSONDecodeError, ValueError):
+            return self._fallback_intent(query)
+        
+        # Cache the result
+        cache_manager.set_llm_cache_obj(intent_prompt, intent)
+        self.intent_cache.set(query, intent)
+        return intent
+    
+    def _extract_search_intent(self, query: str) -> Dict[str, Any]:
+        """Extract search intent and parameters from query."""
+        intent_prompt = self._build_intent_prompt(query)
         
         # Check cache first
-        cached_intent = cache_manager.get_llm_cache(intent_prompt)
-        if cached_intent:
-            try:
-                return eval(cached_intent)
-            except:
-                pass
+        cached_intent = self._cached_intent(query, intent_prompt)
+        if cached_intent is not None:
+            return cached_intent
         
         # Get from LLM
         messages = [
-            SystemMessage(content="You are a search intent analyzer. Extract structured information from user queries."),
+            SystemMessage(content=INTENT_SYSTEM_PROMPT),
             HumanMessage(content=intent_prompt)
         ]
         
         response = llm.invoke(messages)
-        intent_data = response.content.strip()
-        
-        # Cache the result
-        cache_manager.set_llm_cache(intent_prompt, intent_data)
+        return self._intent_from_response(query, intent_prompt, response.content.strip())
+    
+    def _parse_intent(self, intent_data: str) -> Dict[str, Any]:
+        """Decode an intent JSON string, mapping a null price bound to an open range."""
+        intent = _intent_decoder.decode(intent_data)
+        if not isinstance(intent, dict):
+            raise ValueError("Intent must be a JSON object")
         
-        try:
-            return eval(intent_data)
-        except:
-            # Fallback to basic extraction
-            return {
-                "category": "general",
-                "product_type": query.lower(),
-                "brands": [],
-                "price_range": {"min": 0, "max": float('inf')},
-                "features": [],
-                "urgency": "medium"
-            }
+        # A malformed price_range (string, list, ...) means no price constraint
+        price_range = intent.get("price_range")
+        if not isinstance(price_range, dict):
+            price_range = {}
+        if price_range.get("min") is None:
+            price_range["min"] = 0
+        if price_range.get("max") is None:
+            price_range["max"] = float('inf')
+        intent["price_range"] = price_range
+        return intent
     
-    def _calculate_relevance_score(self, product: Dict[str, Any], intent: Dict[str, Any]) -> float:
-        """Calculate relevance score for a product based on search intent."""
-        score = 0.0
+    def _relevance_scores(self, products: List[Dict[str, Any]], intent: Dict[str, Any]) -> np.ndarray:
+        """Calculate relevance scores for all products against the search intent in one pass."""
+        names = np.array([product.get('name', '').lower() for product in products], dtype=str)
         
-        # Product name relevance
-        product_name = product.get('name', '').lower()
-        product_type = intent.get('product_type', '').lower()
+        def hits(term: Optional[str]) -> np.ndarray:
+            return np.char.find(names, (term or '').lower()) >= 0
         
-        if product_type in product_name:
-            score += 0.4
+        # Product name relevance
+        scores = 0.4 * hits(intent.get('product_type', ''))
         
         # Category relevance
-        category = intent.get('category', '').lower()
-        if category in product_name:
-            score += 0.2
-        
-        # Brand relevance
-        brands = intent.get('brands', [])
-        for brand in brands:
-            if brand.lower() in product_name:
-                score += 0.3
-                break
-        
-        # Price relevance
+        scores += 0.2 * hits(intent.get('category', ''))
+        
+        # Brand relevance (counted once even if several brands match)
+        brand_hit = np.zeros(len(products), dtype=bool)
+        for brand in intent.get('brands', []):
+            brand_hit |= hits(brand)
+        scores += 0.3 * brand_hit
+        
+        # Price relevance; unparseable prices compare False and score nothing
         price_range = intent.get('price_range', {})
         try:
-            product_price = float(str(product.get('price', '0')).replace('KWD', '').strip())
-            min_price = price_range.get('min', 0)
-            max_price = price_range.get('max', float('inf'))
-            
-            if min_price <= product_price <= max_price:
-                score += 0.2
-            elif product_price > max_price:
-                score -= 0.1  # Penalty for over-budget
-        except:
+            min_price = float(price_range.get('min', 0))
+            max_price = float(price_range.get('max', float('inf')))
+        except (TypeError, ValueError):
             pass
+        else:
+            prices = price_array(products)
+            scores += 0.2 * ((prices >= min_price) & (prices <= max_price))
+            scores -= 0.1 * (prices > max_price)  # Penalty for over-budget
         
         # Feature relevance
-        features = intent.get('features', [])
-        for feature in features:
-            if feature.lower() in product_name:
-                score += 0.1
+        for feature in intent.get('features', []):
+            scores += 0.1 * hits(feature)
         
-        return max(0.0, min(1.0, score))  # Normalize to 0-1
+        return np.clip(scores, 0.0, 1.0)  # Normalize to 0-1
+    
+    def _product_text(self, product: Dict[str, Any]) -> str:
+        """Text used to vectorize a product."""
+        return f"{product.get('name', '')} {product.get('category', '')}"
     
     def _semantic_similarity(self, query: str, products: List[Dict[str, Any]]) -> List[float]:
         """Calculate semantic similarity between query and products."""
         if not products:
             return []
         
-        # Prepare text for vectorization
-        texts = [query]
-        for product in products:
-            product_text = f"{product.get('name', '')} {product.get('category', '')}"
-            texts.append(product_text)
-        
         try:
-            # Create TF-IDF vectors
-            tfidf_matrix = self.vectorizer.fit_transform(texts)
+            query_vector = self.vectorizer.transform([query])
+            product_vectors = self.vectorizer.transform([self._product_text(p) for p in products])
             
-            # Calculate cosine similarity
-            similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
+            # Rows are L2-normalized, so cosine similarity is a single sparse dot product
+            similarities = (product_vectors @ query_vector.T).toarray().ravel()
             
-            return similarities[0].tolist()
+            return similarities.tolist()
         except:
             # Fallback to basic similarity
             return [0.5] * len(products)
     
-    def _filter_and_rank_products(self, products: List[Dict[str, Any]], intent: Dict[str, Any], query: str) -> List[Dict[str, Any]]:
-        """Filter and rank products based on relevance."""
+    def _filter_and_rank_products(self, products: List[Dict[str, Any]], intent: Dict[str, Any], query: str,
+                                  max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Filter and rank products based on relevance, returning at most max_results."""
         if not products:
             return []
         
-        # Calculate semantic similarity
-        semantic_scores = self._semantic_similarity(query, products)
+        if max_results is not None and max_results <= 0:
+            return []
         
-        # Calculate relevance scores and combine with semantic scores
-        scored_products = []
-        for i, product in enumerate(products):
-            relevance_score = self._calculate_relevance_score(product, intent)
-            semantic_score = semantic_scores[i] if i < len(semantic_scores) else 0.5
-            
-            # Combined score (weighted average)
-            combined_score = (relevance_score * 0.7) + (semantic_score * 0.3)
-            
-            scored_products.append({
-                **product,
-                'relevance_score': combined_score,
-                'semantic_score': semantic_score,
-                'intent_score': relevance_score
-            })
+        # Relevance first: it is cheap and carries most of the weight
+        relevance_scores = self._relevance_scores(products, intent)
+        intent_part = relevance_scores * RELEVANCE_WEIGHT
+        
+        # Similarity lies in [0, 1], so a product whose intent part trails the k-th best by more than
+        # SEMANTIC_WEIGHT can never reach the top k; only the rest are vectorized
+        reachable = np.arange(len(products))
+        if max_results is not None and max_results < len(products):
+            kth_best = np.partition(intent_part, -max_results)[-max_results]
+            reachable = np.flatnonzero(intent_part + SEMANTIC_WEIGHT >= kth_best)
         
-        # Sort by combined score (descending)
-        scored_products.sort(key=lambda x: x['relevance_score'], reverse=True)
+        semantic_scores = np.zeros(len(products))
+        semantic_scores[reachable] = self._semantic_similarity(query, [products[i] for i in reachable])
+        
+        # Combined score (weighted average)
+        combined_scores = intent_part + (semantic_scores * SEMANTIC_WEIGHT)
         
         # Filter by minimum relevance threshold
         threshold = 0.1  # Minimum relevance score
-        filtered_products = [p for p in scored_products if p['relevance_score'] >= threshold]
+        candidates = reachable[combined_scores[reachable] >= threshold]
         
-        return filtered_products
-    
-    def search_products(self, query: str, max_results: int = 10) -> Dict[str, Any]:
-        """Enhanced product search with semantic matching and relevance scoring."""
-        logger.info(f"Enhanced search for query: {query}")
+        # Top-k without sorting everything, then order those by score (ties keep catalog order)
+        if max_results is not None and max_results < len(candidates):
+            candidates = candidates[np.argpartition(-combined_scores[candidates], max_results - 1)[:max_results]]
+        top = candidates[np.lexsort((candidates, -combined_scores[candidates]))]
         
-        # Check cache first
+        # Only the returned products get score-annotated copies
+        return [
+            {
+                **products[i],
+                'relevance_score': float(combined_scores[i]),
+                'semantic_score': float(semantic_scores[i]),
+                'intent_score': float(relevance_scores[i])
+            }
+            for i in top
+        ]
+    
+    def _cached_results(self, query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """Return a search response from the exact or semantic results cache, or None."""
         cached_results = cache_manager.get_product_cache(query)
         if cached_results:
-            logger.info(f"Using cached results for: {query}")
-            return {
-                "success": True,
-                "query": query,
-                "products": cached_results[:max_results],
-                "count": len(cached_results),
-                "cached": True
-            }
-        
-        # Extract search intent
-        intent = self._extract_search_intent(query)
-        logger.info(f"Search intent: {intent}")
-        
-        # Get products from scraping
-        try:
-            search_result = get_product_prices_from_search(query)
-            products = search_result.get('products', [])
-        except Exception as e:
-            logger.error(f"Error in product search: {e}")
-            return {
-                "success": False,
-                "query": query,
-                "error": str(e),
-                "products": [],
-                "count": 0
-            }
+            logger.info("Using cached results for: %s", query)
+        else:
+            cached_results = self.results_cache.get(query)
+            if cached_results is None:
+                return None
+            logger.info("Using semantically cached results for: %s", query)
         
+        return {
+            "success": True,
+            "query": query,
+            "products": cached_results[:max_results],
+            "count": len(cached_results),
+            "cached": True
+        }
+    
+    def _search_error(self, query: str, error: Exception) -> Dict[str, Any]:
+        """Search response for a failed product scrape."""
+        logger.error("Error in product search: %s", error)
+        return {
+            "success": False,
+            "query": query,
+            "error": str(error),
+            "products": [],
+            "count": 0
+        }
+    
+    def _rank_and_cache(self, query: str, products: List[Dict[str, Any]], intent: Dict[str, Any],
+                        max_results: int) -> Dict[str, Any]:
+        """Rank scraped products against the intent and cache the final results."""
         # Filter and rank products
-        ranked_products = self._filter_and_rank_products(products, intent, query)
-        
-        # Limit results
-        final_products = ranked_products[:max_results]
+        final_products = self._filter_and_rank_products(products, intent, query, max_results)
         
         # Cache the results
         cache_manager.set_product_cache(query, final_products)
+        self.results_cache.set(query, final_products)
         
         return {
             "success": True,
@@ -236,6 +306,39 @@ class EnhancedProductSearch:
             "intent": intent,
             "cached": False
         }
+    
+    def search_products(self, query: str, max_results: int = 10) -> Dict[str, Any]:
+        """Enhanced product search with semantic matching and relevance scoring."""
+        logger.info("Enhanced search for query: %s", query)
+        
+        # Check cache first
+        cached = self._cached_results(query, max_results)
+        if cached is not None:
+            return cached
+        
+        # Keyword-only queries skip the LLM; otherwise intent extraction overlaps the scrape
+        intent_future = None
+        if self._is_keyword_query(query):
+            intent = self._fallback_intent(query)
+        else:
+            intent_future = _intent_executor.submit(self._extract_search_intent, query)
+        
+        # Get products from scraping
+        try:
+            search_result = get_product_prices_from_search(query)
+            products = search_result.get('products', [])
+        except Exception as e:
+            return self._search_error(query, e)
+        
+        if intent_future is not None:
+            try:
+                intent = intent_future.result()
+            except Exception as e:
+                logger.warning("Intent extraction failed: %s", e)
+                intent = self._fallback_intent(query)
+        logger.info("Search intent: %s", intent)
+        
+        return self._rank_and_cache(query, products, intent, max_results)
 
 # Initialize enhanced search
 enhanced_search = EnhancedProductSearch()
@@ -5,10 +5,26 @@ Price Filter Tool - Filters products by price range and budget constraints.
 from langchain.tools import tool
 import logging
 import re
+import numpy as np
 from typing import List, Dict, Any
+from app.core.scraping import price_array
 
 logger = logging.getLogger(__name__)
 
+# One pass finds every number; a trailing currency (KWD, KD, dinar) is optional
+_PRICE_NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(?:kwd|kd|dinars?)?')
+_QUERY_WORD_RE = re.compile(r'[a-z]+')
+
+# Price indicator words and two-word phrases, matched against the query's word set
+MAX_PRICE_TERMS = frozenset({'less than', 'under', 'below', 'maximum', 'up to'})
+MIN_PRICE_TERMS = frozenset({'more than', 'over', 'above', 'minimum', 'at least'})
+RANGE_TERMS = frozenset({'between', 'from', 'to', 'range'})
+
+def _query_terms(query_lower: str) -> frozenset:
+    """Words of a query plus its adjacent word pairs, so phrases like 'up to' are a set lookup."""
+    words = _QUERY_WORD_RE.findall(query_lower)
+    return frozenset(words).union(f"{a} {b}" for a, b in zip(words, words[1:]))
+
 def extract_price_constraints(query: str) -> Dict[str, Any]:
     """
     Extract price constraints from a query.
@@ -22,28 +38,20 @@ def extract_price_constraints(query: str) -> Dict[str, Any]:
         'price_range': None
     }
     
-    # Extract numbers followed by currency (KWD, KD, etc.)
-    price_patterns = [
-        r'(\d+(?:\.\d+)?)\s*(?:kwd|kd|dinar|dinars)',
-        r'(\d+(?:\.\d+)?)\s*(?:kwd|kd|dinar|dinars)?',
-        r'(\d+(?:\.\d+)?)'
-    ]
-    
-    numbers = []
-    for pattern in price_patterns:
-        matches = re.findall(pattern, query_lower)
-        numbers.extend([float(match) for match in matches])
+    # Extract numbers, optionally followed by currency (KWD, KD, etc.)
+    numbers = [float(match) for match in _PRICE_NUMBER_RE.findall(query_lower)]
     
     if not numbers:
         return constraints
     
-    # Look for price range indicators
-    if any(word in query_lower for word in ['less than', 'under', 'below', 'maximum', 'up to']):
+    # Look for price range indicators (whole words, so "cover" is not "over")
+    terms = _query_terms(query_lower)
+    if terms & MAX_PRICE_TERMS:
         constraints['max_price'] = max(numbers)
         constraints['budget'] = max(numbers)
-    elif any(word in query_lower for word in ['more than', 'over', 'above', 'minimum', 'at least']):
+    elif terms & MIN_PRICE_TERMS:
         constraints['min_price'] = min(numbers)
-    elif any(word in query_lower for word in ['between', 'from', 'to', 'range']):
+    elif terms & RANGE_TERMS:
         if len(numbers) >= 2:
             constraints['min_price'] = min(numbers)
             constraints['max_price'] = max(numbers)
@@ -59,35 +67,23 @@ def filter_products_by_price(products: List[Dict], constraints: Dict[str, Any])
     """
     Filter products based on price constraints.
     """
-    if not constraints.get('min_price') and not constraints.get('max_price'):
+    min_price = constraints.get('min_price')
+    max_price = constraints.get('max_price')
+    if not min_price and not max_price:
         return products
     
-    filtered_products = []
+    # Scraped prices are already floats; only string prices need parsing
+    prices = price_array(products)
     
-    for product in products:
-        try:
-            # Extract price from product
-            price_str = str(product.get('price', '0'))
-            # Remove currency symbols and convert to float
-            price = float(re.sub(r'[^\d.]', '', price_str))
-            
-            # Apply filters
-            include_product = True
-            
-            if constraints.get('min_price') and price < constraints['min_price']:
-                include_product = False
-            
-            if constraints.get('max_price') and price > constraints['max_price']:
-                include_product = False
-            
-            if include_product:
-                filtered_products.append(product)
-                
-        except (ValueError, TypeError):
-            # If price parsing fails, include the product (better to show than hide)
-            filtered_products.append(product)
+    mask = np.ones(len(products), dtype=bool)
+    if min_price:
+        mask &= prices >= min_price
+    if max_price:
+        mask &= prices <= max_price
+    # If price parsing fails, include the product (better to show than hide)
+    mask |= np.isnan(prices)
     
-    return filtered_products
+    return [products[i] for i in np.flatnonzero(mask)]
 
 @tool("price_filter", return_direct=False)
 def price_filter_tool(products: List[Dict], query: str) -> dict:
@@ -96,16 +92,16 @@ def price_filter_tool(products: List[Dict], query: str) -> dict:
     Use this tool when the user mentions specific prices, budgets, or price ranges.
     """
     logging.info("TOOL | price_filter")
-    logger.info(f"PriceFilterTool: Filtering {len(products)} products for query: '{query}'")
+    logger.info("PriceFilterTool: Filtering %d products for query: '%s'", len(products), query)
     
     try:
         # Extract price constraints from query
         constraints = extract_price_constraints(query)
-        logger.info(f"PriceFilterTool: Extracted constraints: {constraints}")
+        logger.info("PriceFilterTool: Extracted constraints: %s", constraints)
         
         # Filter products
         filtered_products = filter_products_by_price(products, constraints)
-        logger.info(f"PriceFilterTool: Filtered to {len(filtered_products)} products")
+        logger.info("PriceFilterTool: Filtered to %d products", len(filtered_products))
         
         return {
             "success": True,
@@ -117,7 +113,7 @@ def price_filter_tool(products: List[Dict], query: str) -> dict:
         }
         
     except Exception as e:
-        logger.error(f"PriceFilterTool error: {e}")
+        logger.error("PriceFilterTool error: %s", e)
         return {
             "success": False,
             "query": query,
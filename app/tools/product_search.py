@@ -1,23 +1,34 @@
 from langchain.tools import tool
 import logging
+from functools import lru_cache
 from app.core.scraping import get_product_prices_from_search
 import re
 
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r'\b\w+\b')
+_STOP_WORDS = frozenset({
+    'what', 'products', 'do', 'you', 'have', 'for', 'this', 'that', 'the', 'a', 'an',
+    'and', 'or', 'but', 'in', 'on', 'at', 'to', 'of', 'with', 'by', 'is', 'are',
+    'was', 'were', 'be', 'been', 'being', 'has', 'had', 'does', 'did',
+    'will', 'would', 'could', 'should', 'may', 'might', 'can', 'show', 'me', 'tell',
+    'about', 'like', 'similar', 'same', 'other', 'more', 'less', 'cheap', 'expensive',
+    'good', 'best', 'worst', 'new', 'old', 'used', 'available', 'price', 'cost'
+})
+
+@lru_cache(maxsize=4096)
+def _product_tokens(text: str) -> frozenset:
+    """Word tokens of a lowercased product text, computed once per distinct product."""
+    return frozenset(_WORD_RE.findall(text))
+
+@lru_cache(maxsize=1024)
+def _keyword_pattern(keyword_set: frozenset) -> re.Pattern:
+    """Alternation over a query's keywords (longest first), compiled once per distinct keyword set."""
+    return re.compile('|'.join(map(re.escape, sorted(keyword_set, key=len, reverse=True))))
+
 def extract_keywords(query: str) -> list:
     """Extract meaningful keywords from a query."""
-    stop_words = {
-        'what', 'products', 'do', 'you', 'have', 'for', 'this', 'that', 'the', 'a', 'an',
-        'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are',
-        'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
-        'will', 'would', 'could', 'should', 'may', 'might', 'can', 'show', 'me', 'tell',
-        'about', 'like', 'similar', 'same', 'other', 'more', 'less', 'cheap', 'expensive',
-        'good', 'best', 'worst', 'new', 'old', 'used', 'available', 'price', 'cost'
-    }
-    words = re.findall(r'\b\w+\b', query.lower())
-    keywords = [word for word in words if word not in stop_words and len(word) > 2]
-    return keywords
+    return [word for word in _WORD_RE.findall(query.lower()) if len(word) > 2 and word not in _STOP_WORDS]
 
 @tool("product_search", return_direct=False)
 def product_search_tool(query: str) -> dict:
@@ -27,14 +38,14 @@ def product_search_tool(query: str) -> dict:
     Return a list of relevant products with their names, prices, and links.
     """
     logging.info("TOOL | product_search")
-    logger.info(f"ProductSearchTool: Searching for '{query}'")
+    logger.info("ProductSearchTool: Searching for '%s'", query)
     try:
         result = get_product_prices_from_search(query)
         products = result.get('products', [])
         keywords = extract_keywords(query)
-        logger.info(f"ProductSearchTool: Extracted keywords: {keywords}")
+        logger.info("ProductSearchTool: Extracted keywords: %s", keywords)
         if not keywords:
-            logger.info(f"ProductSearchTool: No keywords found, returning all {len(products)} products")
+            logger.info("ProductSearchTool: No keywords found, returning all %d products", len(products))
             return {
                 "success": True,
                 "query": query,
@@ -42,17 +53,18 @@ def product_search_tool(query: str) -> dict:
                 "count": len(products),
                 "formatted_response": result.get('formatted_reply', '')
             }
+        # Whole-word hits are a set intersection; the single-pass substring scan
+        # only runs for products whose tokens miss (e.g. "chair" in "wheelchair")
+        keyword_set = frozenset(keywords)
+        keyword_pattern = _keyword_pattern(keyword_set)
         filtered_products = []
         for product in products:
-            product_name = product.get('name', '').lower()
-            product_category = product.get('category', '').lower()
-            for keyword in keywords:
-                if keyword in product_name or keyword in product_category:
-                    filtered_products.append(product)
-                    break
-        logger.info(f"ProductSearchTool: Found {len(filtered_products)} relevant products for '{query}'")
+            text = f"{product.get('name', '')}\n{product.get('category', '')}".lower()
+            if keyword_set & _product_tokens(text) or keyword_pattern.search(text):
+                filtered_products.append(product)
+        logger.info("ProductSearchTool: Found %d relevant products for '%s'", len(filtered_products), query)
         if not filtered_products and products:
-            logger.info(f"ProductSearchTool: No keyword matches, returning first 5 products")
+            logger.info("ProductSearchTool: No keyword matches, returning first 5 products")
             filtered_products = products[:5]
         return {
             "success": True,
@@ -62,7 +74,7 @@ def product_search_tool(query: str) -> dict:
             "formatted_response": result.get('formatted_reply', '')
         }
     except Exception as e:
-        logger.error(f"ProductSearchTool error: {e}")
+        logger.error("ProductSearchTool error: %s", e)
         return {
             "success": False,
             "query": query,
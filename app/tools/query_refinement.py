@@ -1,25 +1,23 @@
 from langchain.tools import tool
 import logging
 from app.core.llm import get_llm_response
+from app.core.cache import cache_manager
+from app.core.semantic_cache import SemanticCache
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 import re
+import threading
 
 logger = logging.getLogger(__name__)
 
-@tool("query_refinement", return_direct=False)
-def query_refinement_tool(user_query: str, context: str = "", history=None) -> dict:
-    """
-    Analyze and clarify the user's query to extract the main product or category and any specific requirements (e.g., price, quality, features).
-    Use this tool when the user's query is ambiguous, complex, or contains multiple requests.
-    Return the refined product, requirements, and a clean search query.
-    """
-    logging.info("TOOL | query_refinement")
-    logger.info(f"QueryRefinementTool: Refining query '{user_query}'")
-    try:
-        refinement_prompt = f"""
-You are a query refinement assistant. Your job is to extract the core product or intent from user queries.
+_REFINE_PRODUCT_RE = re.compile(r'PRODUCT:\s*(.+)', re.IGNORECASE)
+_REFINE_REQUIREMENTS_RE = re.compile(r'REQUIREMENTS:\s*(.+)', re.IGNORECASE)
+_REFINE_SEARCH_QUERY_RE = re.compile(r'SEARCH_QUERY:\s*(.+)', re.IGNORECASE)
 
-User Query: {user_query}
-Context: {context}
+# Static instructions first and the per-query values last, so every refinement prompt
+# shares a byte-identical prefix that the provider's prompt caching can reuse
+REFINEMENT_INSTRUCTIONS = """You are a query refinement assistant. Your job is to extract the core product or intent from user queries.
 
 Please extract:
 1. The main product or category the user is looking for
@@ -35,15 +33,211 @@ Return your response in this format:
 PRODUCT: [main product/category]
 REQUIREMENTS: [specific requirements or modifiers]
 SEARCH_QUERY: [clean query for product search]
+
+---
 """
-        refined_response = get_llm_response(refinement_prompt, history=history)
-        product_match = re.search(r'PRODUCT:\s*(.+)', refined_response, re.IGNORECASE)
-        requirements_match = re.search(r'REQUIREMENTS:\s*(.+)', refined_response, re.IGNORECASE)
-        search_query_match = re.search(r'SEARCH_QUERY:\s*(.+)', refined_response, re.IGNORECASE)
+REFINEMENT_QUERY_TEMPLATE = "User Query: {user_query}\nContext: {context}"
+
+# Short queries made only of one product word, known brands, ranking modifiers and filler
+# ("cheapest sunrise wheelchairs", "i need a cane") are refined without the LLM. Any other word
+# (a feature, an accessory, a question like "do you deliver") or a number sends the query to the model.
+FAST_PATH_MAX_LENGTH = 40
+_FAST_PATH_WORD_RE = re.compile(r'[a-z]+|\d')
+FAST_PATH_PRODUCTS = {
+    "wheelchair": "wheelchair", "wheelchairs": "wheelchair",
+    "walker": "walker", "walkers": "walker",
+    "cane": "cane", "canes": "cane",
+    "crutch": "crutches", "crutches": "crutches",
+}
+FAST_PATH_BRANDS = frozenset({"sunrise", "drive"})
+# Ranking modifier words, as the requirement phrasing they stand for
+FAST_PATH_MODIFIERS = {"cheapest": "cheapest", "lowest": "cheapest", "best": "best", "highest": "most expensive"}
+FAST_PATH_FILLER = frozenset({
+    "a", "an", "the", "some", "any", "me", "i", "show", "find", "need", "want", "please",
+    "looking", "for", "buy", "get", "do", "you", "have"
+})
+
+def _fast_path_refinement(user_query: str) -> Optional[Dict[str, Any]]:
+    """Refinement result for a trivially unambiguous query, or None when the LLM is needed."""
+    query = " ".join(user_query.lower().split())
+    if len(query) >= FAST_PATH_MAX_LENGTH:
+        return None
+    words = _FAST_PATH_WORD_RE.findall(query.replace("most expensive", "highest"))
+    
+    products, search_words, requirements = [], [], []
+    for word in words:
+        if word in FAST_PATH_PRODUCTS:
+            products.append(FAST_PATH_PRODUCTS[word])
+            search_words.append(word)
+        elif word in FAST_PATH_BRANDS:
+            search_words.append(word)
+        elif word in FAST_PATH_MODIFIERS:
+            if FAST_PATH_MODIFIERS[word] not in requirements:
+                requirements.append(FAST_PATH_MODIFIERS[word])
+        elif word not in FAST_PATH_FILLER:
+            return None
+    if len(products) != 1:
+        return None
+    
+    return {
+        "success": True,
+        "original_query": user_query,
+        "product": products[0],
+        "requirements": " ".join(requirements),
+        "search_query": " ".join(search_words),
+        "refined_response": ""
+    }
+
+# Refinements arriving within this window share one LLM call
+REFINEMENT_BATCH_SIZE = 8
+REFINEMENT_BATCH_WAIT = 0.02
+_BATCH_ANSWER_LABEL_RE = re.compile(r'^\s*Answer\s+(\d+)\s*:\s*$', re.IGNORECASE | re.MULTILINE)
+
+# Per-query fallback calls for a batch whose answers can't be matched run here, concurrently
+_refinement_executor = ThreadPoolExecutor(max_workers=REFINEMENT_BATCH_SIZE, thread_name_prefix="query-refinement")
+
+def _build_batch_refinement_prompt(queries: List[Tuple[str, str]]) -> str:
+    """Build one refinement prompt covering several numbered (query, context) pairs."""
+    numbered = "\n\n".join(
+        f"Query {i}:\n" + REFINEMENT_QUERY_TEMPLATE.format(user_query=user_query, context=context)
+        for i, (user_query, context) in enumerate(queries, 1)
+    )
+    return (
+        f"Refine each of these {len(queries)} queries. Answer each one in the format above, "
+        f"under a line 'Answer N:' where N is the number of its query.\n\n{numbered}"
+    )
+
+def _split_batch_answers(response: str, count: int) -> Optional[List[str]]:
+    """
+    Answers of a batched refinement in query order, matched on their 'Answer N:' labels.
+    
+    None unless every query got exactly one answer holding exactly one PRODUCT line, so a
+    reply that drops, merges or repeats answers is never handed to the wrong query.
+    """
+    parts = _BATCH_ANSWER_LABEL_RE.split(response)
+    answers: Dict[int, str] = {}
+    for label, answer in zip(parts[1::2], parts[2::2]):
+        number = int(label)
+        answer = answer.strip()
+        if number in answers or not 1 <= number <= count or len(_REFINE_PRODUCT_RE.findall(answer)) != 1:
+            return None
+        answers[number] = answer
+    if len(answers) != count:
+        return None
+    return [answers[number] for number in range(1, count + 1)]
+
+class _RefinementBatcher:
+    """Coalesces refinement requests from concurrent callers into a single LLM call."""
+
+    def __init__(self, max_batch: int = REFINEMENT_BATCH_SIZE, max_wait: float = REFINEMENT_BATCH_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str, Future]] = []
+        self._full = threading.Event()
+
+    def submit(self, user_query: str, context: str) -> str:
+        """Refine one query; the first caller of a batch waits briefly for others and runs it."""
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((user_query, context, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+
+        if leader:
+            self._full.wait(self.max_wait)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._full.clear()
+            self._run(batch)
+        return future.result()
+
+    def _run(self, batch: List[Tuple[str, str, Future]]) -> None:
+        """Refine a drained batch and resolve its futures."""
+        if len(batch) > 1:
+            try:
+                response = get_llm_response(
+                    _build_batch_refinement_prompt([(query, context) for query, context, _ in batch]),
+                    system_prompt=REFINEMENT_INSTRUCTIONS
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                return
+            answers = _split_batch_answers(response, len(batch))
+            if answers is not None:
+                for (_, _, future), answer in zip(batch, answers):
+                    future.set_result(answer)
+                return
+            logger.warning("Batched refinement answers didn't match its %d queries", len(batch))
+        
+        # Single query, or the batched answers couldn't be matched: one call per query,
+        # all at once so the last caller waits one round trip rather than len(batch)
+        for item in batch[1:]:
+            _refinement_executor.submit(self._refine_one, *item)
+        self._refine_one(*batch[0])
+
+    @staticmethod
+    def _refine_one(user_query: str, context: str, future: Future) -> None:
+        """Refine a single query with its own LLM call and resolve its future."""
+        try:
+            future.set_result(get_llm_response(
+                REFINEMENT_QUERY_TEMPLATE.format(user_query=user_query, context=context),
+                system_prompt=REFINEMENT_INSTRUCTIONS
+            ))
+        except Exception as e:
+            future.set_exception(e)
+
+_refinement_batcher = _RefinementBatcher()
+
+# L1: exact (query, context) hits; L2: near-duplicate queries ("cheap wheelchair" ~ "cheap wheelchairs")
+REFINEMENT_CACHE_SIZE = 2048
+_refinement_semantic_cache = SemanticCache(ttl=cache_manager.LLM_CACHE_TTL)
+
+@lru_cache(maxsize=REFINEMENT_CACHE_SIZE)
+def _cached_refinement(user_query: str, context: str) -> str:
+    """Refinement LLM response for a history-free query, served from the caches when possible."""
+    if not context:
+        cached = _refinement_semantic_cache.get(user_query)
+        if cached is not None:
+            return cached
+    
+    refined_response = _refinement_batcher.submit(user_query, context)
+    if not context:
+        _refinement_semantic_cache.set(user_query, refined_response)
+    return refined_response
+
+@tool("query_refinement", return_direct=False)
+def query_refinement_tool(user_query: str, context: str = "", history=None) -> dict:
+    """
+    Analyze and clarify the user's query to extract the main product or category and any specific requirements (e.g., price, quality, features).
+    Use this tool when the user's query is ambiguous, complex, or contains multiple requests.
+    Return the refined product, requirements, and a clean search query.
+    """
+    logging.info("TOOL | query_refinement")
+    logger.info("QueryRefinementTool: Refining query '%s'", user_query)
+    fast_result = _fast_path_refinement(user_query)
+    if fast_result is not None:
+        logger.info("QueryRefinementTool: '%s' is unambiguous, skipping the LLM", user_query)
+        return fast_result
+    try:
+        if history:
+            # Conversational context changes the answer, so these calls are never cached
+            refined_response = get_llm_response(
+                REFINEMENT_QUERY_TEMPLATE.format(user_query=user_query, context=context),
+                history=history,
+                system_prompt=REFINEMENT_INSTRUCTIONS
+            )
+        else:
+            refined_response = _cached_refinement(" ".join(user_query.split()), context)
+        product_match = _REFINE_PRODUCT_RE.search(refined_response)
+        requirements_match = _REFINE_REQUIREMENTS_RE.search(refined_response)
+        search_query_match = _REFINE_SEARCH_QUERY_RE.search(refined_response)
         product = product_match.group(1).strip() if product_match else user_query
         requirements = requirements_match.group(1).strip() if requirements_match else ""
         search_query = search_query_match.group(1).strip() if search_query_match else product
-        logger.info(f"QueryRefinementTool: Refined '{user_query}' to product='{product}', requirements='{requirements}', search_query='{search_query}'")
+        logger.info("QueryRefinementTool: Refined '%s' to product='%s', requirements='%s', search_query='%s'", user_query, product, requirements, search_query)
         return {
             "success": True,
             "original_query": user_query,
@@ -53,7 +247,7 @@ SEARCH_QUERY: [clean query for product search]
             "refined_response": refined_response
         }
     except Exception as e:
-        logger.error(f"QueryRefinementTool error: {e}")
+        logger.error("QueryRefinementTool error: %s", e)
         return {
             "success": False,
             "error": str(e),
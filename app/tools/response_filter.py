@@ -1,16 +1,35 @@
 from langchain.tools import tool
+import json
 import logging
 from app.core.llm import get_llm_response
 
 logger = logging.getLogger(__name__)
 
+_json_decoder = json.JSONDecoder()
+
+def _parse_product_list(llm_response: str) -> list:
+    """Decode the JSON product list from the LLM reply, tolerating surrounding prose."""
+    text = llm_response.strip()
+    if text.startswith('['):
+        # Fast path: the prompt asks for the bare array
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    # Decode the first complete array; brackets inside strings don't confuse the parser
+    start = text.find('[')
+    if start == -1:
+        return []
+    products, _ = _json_decoder.raw_decode(text, start)
+    return products if isinstance(products, list) else []
+
 @tool("response_filter", return_direct=False)
 def response_filter_tool(products, filter_criteria: str) -> dict:
     """
     Use the LLM to filter and sort a list of products based on user-specified criteria such as price, quality, or features.
     """
     logging.info("TOOL | response_filter")
-    logger.info(f"ResponseFilterTool: Filtering {len(products)} products with criteria '{filter_criteria}'")
+    logger.info("ResponseFilterTool: Filtering %d products with criteria '%s'", len(products), filter_criteria)
     if not products:
         return {
             "success": False,
@@ -23,20 +42,16 @@ def response_filter_tool(products, filter_criteria: str) -> dict:
             "You are an expert assistant. The user has asked to filter or sort the following products based on these criteria: "
             f"'{filter_criteria}'.\n"
             "Here is the product list (as JSON):\n"
-            f"{products}\n"
+            f"{json.dumps(products, ensure_ascii=False, separators=(',', ':'))}\n"
             "Return a JSON list of the filtered and/or sorted products that best match the criteria. "
-            "If nothing matches, return an empty list."
+            "If nothing matches, return an empty list. Respond with ONLY the JSON array on a single line."
         )
         llm_response = get_llm_response(prompt)
         # Try to extract the JSON list from the LLM's response
-        import json
         try:
-            # Find the first JSON list in the response
-            start = llm_response.find('[')
-            end = llm_response.rfind(']')
-            filtered_products = json.loads(llm_response[start:end+1]) if start != -1 and end != -1 else []
+            filtered_products = _parse_product_list(llm_response)
         except Exception as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
+            logger.error("Failed to parse LLM response as JSON: %s", e)
             filtered_products = []
         return {
             "success": True,
@@ -46,7 +61,7 @@ def response_filter_tool(products, filter_criteria: str) -> dict:
             "llm_response": llm_response
         }
     except Exception as e:
-        logger.error(f"ResponseFilterTool error: {e}")
+        logger.error("ResponseFilterTool error: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -2,31 +2,55 @@
 Tools for the chatbot application.
 """
 
+from functools import partial
 from typing import Dict, List, Any
-from app.core.scraping import get_product_prices_from_search
+from app.core.keywords import KeywordMatcher
+
+# numpy and the scraper (httpx, bs4, openai) are imported on first use so that importing
+# the keyword constants here stays cheap
 
 # Note: ProductSearchTool has been removed to eliminate duplication.
 # Use product_search_tool from app.tools.product_search instead.
 
+PRODUCT_KEYWORDS = ("wheelchair", "crutches", "walker", "cane", "medical")
+
+# Every filter/refinement keyword found in one scan of the query
+_query_matcher = KeywordMatcher({
+    "cheapest": ("cheapest", "lowest"),
+    "most_expensive": ("most expensive", "highest"),
+    "best": ("best",),
+    **{keyword: (keyword,) for keyword in PRODUCT_KEYWORDS}
+})
+
+def _price_extreme(products: List[Dict], highest: bool) -> List[Dict]:
+    """The single cheapest (or most expensive) product; [] when no product has a usable price."""
+    import numpy as np
+    from app.core.scraping import price_array
+    
+    # Only one product is returned, so a vectorized arg-reduction replaces the full sort
+    prices = price_array(products)
+    if np.isnan(prices).all():
+        return []
+    best = np.nanargmax(prices) if highest else np.nanargmin(prices)
+    return [products[int(best)]]
+
+# Filter kinds in precedence order, each with its handler, so _run classifies once and dispatches
+FILTER_KINDS = ("cheapest", "most_expensive", "best")
+_FILTER_HANDLERS = {
+    "cheapest": partial(_price_extreme, highest=False),
+    "most_expensive": partial(_price_extreme, highest=True),
+    "best": partial(_price_extreme, highest=False),
+    "none": list,
+}
+
 class ResponseFilterTool:
     def __init__(self):
         self.name = "response_filter"
         self.description = "Filter and sort products based on user requirements"
     def _run(self, products: List[Dict], query: str) -> Dict[str, Any]:
-        query_lower = query.lower()
-        if "cheapest" in query_lower or "lowest" in query_lower:
-            sorted_products = sorted(products, key=lambda x: float(x["price"].split()[0]))
-            filter_type = "cheapest"
-        elif "most expensive" in query_lower or "highest" in query_lower:
-            sorted_products = sorted(products, key=lambda x: float(x["price"].split()[0]), reverse=True)
-            filter_type = "most_expensive"
-        elif "best" in query_lower:
-            sorted_products = sorted(products, key=lambda x: float(x["price"].split()[0]))
-            filter_type = "best"
-        else:
-            sorted_products = products
-            filter_type = "none"
-        filtered_products = sorted_products[:1] if filter_type != "none" else products
+        matched = _query_matcher.groups(query.lower())
+        filter_type = next((kind for kind in FILTER_KINDS if kind in matched), "none")
+        filtered_products = _FILTER_HANDLERS[filter_type](products)
         return {"success": True, "filtered_products": filtered_products, "filter_type": filter_type, "count": len(filtered_products)}
 
 class QueryRefinementTool:
@@ -34,20 +58,9 @@ class QueryRefinementTool:
         self.name = "query_refinement"
         self.description = "Refine and clarify user queries for better product search"
     def _run(self, query: str) -> Dict[str, Any]:
-        query_lower = query.lower()
-        product_keywords = ["wheelchair", "crutches", "walker", "cane", "medical"]
-        product = None
-        for keyword in product_keywords:
-            if keyword in query_lower:
-                product = keyword
-                break
-        requirements = []
-        if "cheapest" in query_lower or "lowest" in query_lower:
-            requirements.append("cheapest")
-        if "best" in query_lower:
-            requirements.append("best")
-        if "most expensive" in query_lower or "highest" in query_lower:
-            requirements.append("most_expensive")
+        matched = _query_matcher.groups(query.lower())
+        product = next((keyword for keyword in PRODUCT_KEYWORDS if keyword in matched), None)
+        requirements = [requirement for requirement in ("cheapest", "best", "most_expensive") if requirement in matched]
         search_query = product if product else "medical equipment"
         return {"success": True, "search_query": search_query, "product": product, "requirements": " ".join(requirements) if requirements else "general"}
 
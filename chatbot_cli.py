@@ -4,41 +4,181 @@ Simple CLI for interacting with the Al Essa Kuwait Virtual Sales Representative
 """
 
 import sys
-import json
+import time
+import orjson
+import atexit
+import threading
 import requests
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, Optional, Tuple, Union
+
+API_URL = "http://localhost:8000"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# One keep-alive connection for the whole CLI session instead of a new TCP handshake per turn
+_session = requests.Session()
+# Retry transient failures with backoff: connection errors for any request (nothing reached the
+# server), 502/503/504 only for GETs, since re-POSTing a chat turn would run the agent twice
+_retries = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    raise_on_status=False
+)
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_retries))
+_session.headers["Connection"] = "keep-alive"
+atexit.register(_session.close)
+
+# Agent badges, built once instead of re-titling the agent type for every message
+AGENT_EMOJIS = {"doctor": "🩺", "sales": "💼"}
+AGENT_NAMES = {"doctor": "Doctor Agent", "sales": "Sales Agent"}
+
+EXIT_COMMANDS = frozenset({"quit", "exit", "bye"})
+
+# History only changes when a message is sent, so a short-lived copy answers repeated lookups
+HISTORY_CACHE_TTL = 5.0
+_history_cache: Dict[Tuple[str, Union[int, str, None]], Tuple[float, Dict[str, Any]]] = {}
+STARTUP_HISTORY_TURNS = 3
+
+class Spinner:
+    """Animated "Thinking..." line drawn on a background thread while a request is in flight."""
+    
+    FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+    
+    def __init__(self, message: str = "🤖 Bot: Thinking..."):
+        self.message = message
+        self._done = threading.Event()
+        self._thread = None
+    
+    def start(self) -> None:
+        if not sys.stdout.isatty():
+            print(self.message)
+            return
+        self._done.clear()
+        self._thread = threading.Thread(target=self._spin, daemon=True)
+        self._thread.start()
+    
+    def _spin(self) -> None:
+        i = 0
+        while not self._done.wait(0.1):
+            sys.stdout.write(f"\r{self.FRAMES[i % len(self.FRAMES)]} {self.message}")
+            sys.stdout.flush()
+            i += 1
+    
+    def stop(self) -> None:
+        """Stop the animation and clear its line; safe to call more than once."""
+        if self._thread is None:
+            return
+        self._done.set()
+        self._thread.join()
+        self._thread = None
+        sys.stdout.write("\r\033[K")
+        sys.stdout.flush()
+
+_thinking = Spinner()
 
 def chat_with_bot(message: str, session_id: str = "cli_session") -> Dict[str, Any]:
     """
     Send a message to the chatbot via the API.
     """
     try:
-        response = requests.post(
-            "http://localhost:8000/chat",
-            json={"text": message, "session_id": session_id},
+        response = _session.post(
+            f"{API_URL}/chat",
+            data=orjson.dumps({"text": message, "session_id": session_id}),
+            headers=JSON_HEADERS,
             timeout=30
         )
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         return {"error": f"Failed to connect to chatbot: {e}"}
 
-def get_session_history(session_id: str = "cli_session") -> Dict[str, Any]:
+def chat_in_process(message: str, session_id: str = "cli_session") -> Dict[str, Any]:
     """
-    Get session history from the API.
+    Run the agent in this process, skipping the JSON/HTTP round trip to a local API server.
+    
+    Returns the same dict shape as the /chat endpoint.
     """
+    from app.agents.agent import chatbot_agent
+    return chatbot_agent.process_query(message, session_id)
+
+def history_in_process(session_id: str = "cli_session", limit: Union[int, str, None] = None) -> Dict[str, Any]:
+    """
+    Read session history straight from conversation memory, for use alongside chat_in_process.
+    
+    Takes the same `limit` values and returns the same dict shape as get_session_history.
+    """
+    from app.core.conversation_memory import conversation_memory
+    if limit is None:
+        limit = 10  # the API's default
+    elif limit == "all":
+        limit = None
+    return {"session_id": session_id, "history": conversation_memory.get_turns(session_id, limit)}
+
+def get_session_history(session_id: str = "cli_session", limit: Union[int, str, None] = None) -> Dict[str, Any]:
+    """
+    Get session history from the API, reusing a copy fetched in the last few seconds.
+    
+    The server returns only the last `limit` turns (its default when omitted, every turn for "all").
+    """
+    key = (session_id, limit)
+    cached = _history_cache.get(key)
+    if cached and time.monotonic() - cached[0] < HISTORY_CACHE_TTL:
+        return cached[1]
     try:
-        response = requests.get(
-            f"http://localhost:8000/chat-history/{session_id}",
+        response = _session.get(
+            f"{API_URL}/chat-history/{session_id}",
+            params={"limit": limit} if limit is not None else None,
             timeout=10
         )
         if response.status_code == 200:
-            return response.json()
+            history = orjson.loads(response.content)
+            _history_cache[key] = (time.monotonic(), history)
+            return history
         else:
             return {"history": []}
     except:
         return {"history": []}
 
+def format_result(result: Dict[str, Any]) -> str:
+    """
+    Render a chat result (reply, agent, products, workflow) as one block of text.
+    """
+    lines = []
+    
+    # Display bot response
+    reply = result.get("reply", "I'm sorry, I didn't understand that.")
+    lines.append(f"🤖 Bot: {reply}")
+    
+    # Display agent type and routing decision
+    agent_type = result.get("agent_type", "unknown")
+    routing_decision = result.get("routing_decision", "unknown")
+    if agent_type != "unknown":
+        agent_emoji = AGENT_EMOJIS.get(agent_type, "💼")
+        agent_name = AGENT_NAMES.get(agent_type) or f"{agent_type.title()} Agent"
+        lines.append(f"{agent_emoji} Agent: {agent_name}")
+        lines.append(f"🎯 Routing: {routing_decision}")
+    
+    # Display products if any
+    products = result.get("products", [])
+    if products:
+        lines.append("\n🛍️ Products found:")
+        for i, product in enumerate(products[:3], 1):  # Show max 3 products
+            name = product.get("name", "Unknown Product")
+            price = product.get("price", "Price not available")
+            lines.append(f"   {i}. {name} - {price}")
+        if len(products) > 3:
+            lines.append(f"   ... and {len(products) - 3} more products")
+    
+    # Display workflow steps
+    workflow = result.get("workflow_steps", [])
+    if workflow:
+        lines.append(f"\n🔧 Workflow: {' → '.join(workflow)}")
+    
+    return "".join(line + "\n" for line in lines)
+
 def main():
     """
     Main CLI loop for chatting with the bot.
@@ -52,41 +192,56 @@ def main():
     
     session_id = "cli_session"
     
+    # --inproc runs the agent directly instead of talking to the API server
+    send_message = chat_with_bot
+    get_history = get_session_history
+    if "--inproc" in sys.argv[1:]:
+        try:
+            from app.agents.agent import chatbot_agent  # noqa: F401
+            send_message = chat_in_process
+            get_history = history_in_process
+            print("⚡ Running the agent in-process (no API server needed).")
+        except ImportError as e:
+            print(f"⚠️ In-process mode unavailable ({e}); using the API at {API_URL}.")
+    
     # Show recent history if available
-    history_data = get_session_history(session_id)
+    history_data = get_history(session_id, limit=STARTUP_HISTORY_TURNS)
     if history_data.get("history"):
         print("\n📚 Recent conversation history:")
-        for msg in history_data["history"][-3:]:  # Show last 3 messages
-            role_emoji = "👤" if msg.get("role") == "user" else "🤖"
-            print(f"{role_emoji} {msg.get('content', '')[:100]}...")
+        for turn in history_data["history"]:
+            if turn.get("user"):
+                print(f"👤 {turn['user'][:100]}...")
+            if turn.get("assistant"):
+                print(f"🤖 {turn['assistant'][:100]}...")
         print()
     
     while True:
         try:
             # Get user input
             user_input = input("\n👤 You: ").strip()
+            command = user_input.lower()
             
             # Check for special commands
-            if user_input.lower() in ['quit', 'exit', 'bye']:
+            if command in EXIT_COMMANDS:
                 print("\n🤖 Bot: Goodbye! Have a great day!")
                 break
             
-            if user_input.lower() == 'history':
-                history_data = get_session_history(session_id)
+            if command == 'history':
+                history_data = get_history(session_id, limit="all")
                 if history_data.get("history"):
                     print("\n📚 Full conversation history:")
-                    for i, msg in enumerate(history_data["history"], 1):
-                        role_emoji = "👤" if msg.get("role") == "user" else "🤖"
-                        agent_type = msg.get("agent_type", "")
-                        agent_emoji = "🩺" if agent_type == "doctor" else "💼" if agent_type == "sales" else ""
-                        print(f"{i}. {role_emoji} {msg.get('content', '')}")
-                        if agent_emoji:
-                            print(f"   {agent_emoji} {agent_type.title()} Agent")
+                    for i, turn in enumerate(history_data["history"], 1):
+                        print(f"{i}. 👤 {turn.get('user') or ''}")
+                        if turn.get("assistant"):
+                            print(f"   🤖 {turn['assistant']}")
+                        agent_type = turn.get("agent_type", "")
+                        if agent_type in AGENT_EMOJIS:
+                            print(f"   {AGENT_EMOJIS[agent_type]} {AGENT_NAMES[agent_type]}")
                 else:
                     print("\n📚 No conversation history found.")
                 continue
             
-            if user_input.lower() == 'new':
+            if command == 'new':
                 session_id = f"cli_session_{len(session_id)}"
                 print(f"\n🔄 Started new session: {session_id}")
                 continue
@@ -95,40 +250,23 @@ def main():
                 continue
             
             # Send to bot
-            print("🤖 Bot: Thinking...")
-            result = chat_with_bot(user_input, session_id)
+            _thinking.start()
+            try:
+                result = send_message(user_input, session_id)
+            finally:
+                _thinking.stop()
+            
+            # The turn was recorded server-side (or failed part-way), so cached history is stale
+            for key in [key for key in _history_cache if key[0] == session_id]:
+                del _history_cache[key]
             
             if "error" in result:
                 print(f"❌ Error: {result['error']}")
                 continue
             
-            # Display bot response
-            reply = result.get("reply", "I'm sorry, I didn't understand that.")
-            print(f"🤖 Bot: {reply}")
-            
-            # Display agent type and routing decision
-            agent_type = result.get("agent_type", "unknown")
-            routing_decision = result.get("routing_decision", "unknown")
-            if agent_type != "unknown":
-                agent_emoji = "🩺" if agent_type == "doctor" else "💼"
-                print(f"{agent_emoji} Agent: {agent_type.title()} Agent")
-                print(f"🎯 Routing: {routing_decision}")
-            
-            # Display products if any
-            products = result.get("products", [])
-            if products:
-                print("\n🛍️ Products found:")
-                for i, product in enumerate(products[:3], 1):  # Show max 3 products
-                    name = product.get("name", "Unknown Product")
-                    price = product.get("price", "Price not available")
-                    print(f"   {i}. {name} - {price}")
-                if len(products) > 3:
-                    print(f"   ... and {len(products) - 3} more products")
-            
-            # Display workflow steps
-            workflow = result.get("workflow_steps", [])
-            if workflow:
-                print(f"\n🔧 Workflow: {' → '.join(workflow)}")
+            # One write per turn instead of a print (and stdout lock/flush) per line
+            sys.stdout.write(format_result(result))
+            sys.stdout.flush()
             
         except KeyboardInterrupt:
             print("\n\n🤖 Bot: Goodbye! Have a great day!")
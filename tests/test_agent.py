@@ -1,6 +1,7 @@
 """
 Tests for the Agentic Workflow
 """
+import re
 import pytest
 from unittest.mock import patch, MagicMock
 from app.agents.agent import ChatbotAgent
@@ -108,6 +109,88 @@ class TestTools:
         tool = QueryRefinementTool()
         assert tool.name == "query_refinement"
         assert "Refine and clarify" in tool.description
+    
+    def test_concurrent_refinements_share_one_llm_call(self):
+        """Test that refinements arriving together are answered by a single batched LLM call"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.tools.query_refinement import _RefinementBatcher
+        
+        batcher = _RefinementBatcher(max_batch=3, max_wait=5)
+        
+        def labelled_answers(prompt, system_prompt=""):
+            # Answer in reverse order; the labels, not the positions, say which query each is for
+            queries = re.findall(r'Query (\d+):\nUser Query: (\w+)', prompt)
+            return "\n\n".join(f"Answer {number}:\nPRODUCT: {query}\nREQUIREMENTS: None\nSEARCH_QUERY: {query}"
+                                 for number, query in reversed(queries))
+        
+        with patch('app.tools.query_refinement.get_llm_response', side_effect=labelled_answers) as mock_llm:
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                results = list(pool.map(lambda query: batcher.submit(query, ""), ["a", "b", "c"]))
+        
+        assert mock_llm.call_count == 1
+        assert [result.splitlines()[0] for result in results] == ["PRODUCT: a", "PRODUCT: b", "PRODUCT: c"]
+    
+    def test_unmatched_batch_answers_fall_back_to_single_calls(self):
+        """Test that a batched reply with merged or missing answers is not handed out by position"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.tools.query_refinement import _RefinementBatcher
+        
+        batcher = _RefinementBatcher(max_batch=2, max_wait=5)
+        
+        def reply(prompt, system_prompt=""):
+            if prompt.startswith("Refine each"):
+                return "Answer 1:\nPRODUCT: a\nPRODUCT: b\nSEARCH_QUERY: a b\n\nAnswer 1:\nPRODUCT: a"
+            return "PRODUCT: " + re.search(r'User Query: (\w+)', prompt).group(1)
+        
+        with patch('app.tools.query_refinement.get_llm_response', side_effect=reply) as mock_llm:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                results = list(pool.map(lambda query: batcher.submit(query, ""), ["a", "b"]))
+        
+        assert mock_llm.call_count == 3
+        assert results == ["PRODUCT: a", "PRODUCT: b"]
+    
+    def test_refinement_cache_keeps_price_direction(self):
+        """Test that an "over" query is not answered with the cached "under" refinement"""
+        from app.tools.query_refinement import query_refinement_tool, _refinement_semantic_cache
+        
+        _refinement_semantic_cache.clear()
+        responses = [
+            "PRODUCT: wheelchair\nREQUIREMENTS: under 50 KWD\nSEARCH_QUERY: wheelchair under 50",
+            "PRODUCT: wheelchair\nREQUIREMENTS: over 50 KWD\nSEARCH_QUERY: wheelchair over 50",
+        ]
+        with patch('app.tools.query_refinement.get_llm_response', side_effect=responses) as mock_llm:
+            under = query_refinement_tool.invoke({"user_query": "cheapest folding wheelchair under 50"})
+            over = query_refinement_tool.invoke({"user_query": "cheapest folding wheelchair over 50"})
+        
+        assert mock_llm.call_count == 2
+        assert under["requirements"] == "under 50 KWD"
+        assert over["requirements"] == "over 50 KWD"
+        _refinement_semantic_cache.clear()
+    
+    def test_unambiguous_queries_skip_refinement_llm(self):
+        """Test that short single-product queries are refined locally"""
+        from app.tools.query_refinement import query_refinement_tool
+        
+        with patch('app.tools.query_refinement.get_llm_response') as mock_llm:
+            result = query_refinement_tool.invoke({"user_query": "Cheapest crutches"})
+        
+        mock_llm.assert_not_called()
+        assert result["product"] == "crutches"
+        assert result["search_query"] == "crutches"
+        assert result["requirements"] == "cheapest"
+    
+    def test_fast_path_keeps_qualifiers_and_defers_other_queries(self):
+        """Test that brands stay in the search query and anything beyond product/modifier words goes to the LLM"""
+        from app.tools.query_refinement import _fast_path_refinement
+        
+        result = _fast_path_refinement("most expensive Sunrise wheelchairs")
+        assert result["product"] == "wheelchair"
+        assert result["search_query"] == "sunrise wheelchairs"
+        assert result["requirements"] == "most expensive"
+        
+        for query in ["wheelchair cushion", "pediatric walker", "hurricane", "do you deliver wheelchairs?",
+                      "wheelchair under 50", "walker and cane"]:
+            assert _fast_path_refinement(query) is None
 
 
 if __name__ == "__main__":
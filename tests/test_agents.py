@@ -135,6 +135,22 @@ def test_agent_router_sales_routing():
             assert result["agent_type"] == "sales"
             assert "products" in result
 
+def test_plain_product_queries_skip_llm_planning():
+    """Test that plain product requests run the search plan without any LLM call."""
+    with patch('app.agents.agent_router.llm') as mock_router_llm, \
+         patch('app.agents.sales_agent.llm') as mock_sales_llm, \
+         patch('app.agents.sales_agent.product_search_tool') as mock_tool:
+        mock_tool.invoke.return_value = {"success": True, "products": REAL_PRODUCTS, "count": len(REAL_PRODUCTS)}
+        
+        result = agent_router.route_query("Do you have Sunrise wheelchairs?", "test_direct_session")
+        
+        assert result["routing_decision"] == "sales"
+        assert "direct_plan" in result["workflow_steps"]
+        assert len(result["products"]) == len(REAL_PRODUCTS)
+        mock_tool.invoke.assert_called_with({"query": "Do you have Sunrise wheelchairs?"})
+        mock_router_llm.invoke.assert_not_called()
+        mock_sales_llm.batch.assert_not_called()
+
 def test_agent_router_doctor_routing():
     """Test that agent router correctly routes medical queries."""
     with patch('app.core.llm.llm') as mock_llm:
@@ -0,0 +1,22 @@
+"""
+Tests for the single-pass keyword matcher.
+"""
+
+from app.core.keywords import KeywordMatcher
+
+def test_matches_every_group_in_one_pass():
+    """Test that overlapping and shared keywords report every group they belong to."""
+    matcher = KeywordMatcher({
+        "back": ("back", "spine"),
+        "scoliosis": ("scoliosis", "curved spine"),
+        "arm": ("wrist", "arm"),
+        "shoulder": ("shoulder", "arm"),
+    })
+
+    assert matcher.groups("i have a curved spine and my arm hurts") == {"back", "scoliosis", "arm", "shoulder"}
+    assert matcher.groups("wrists ache") == {"arm"}
+    assert matcher.groups("headache") == set()
+
+def test_empty_matcher_matches_nothing():
+    """Test that a matcher without keywords never matches."""
+    assert KeywordMatcher({}).groups("anything") == set()
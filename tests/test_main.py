@@ -1,7 +1,7 @@
 from fastapi.testclient import TestClient
 from app.api.main import app
 import requests
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 client = TestClient(app)
 
@@ -15,9 +15,9 @@ def mock_get_products(*args, **kwargs):
     """Mock the get_products method of MagentoScraper"""
     return {"products": MOCK_PRODUCTS}
 
-@patch('app.api.main.get_product_prices_from_search', side_effect=mock_get_products)
+@patch('app.api.main.aget_product_prices_from_search', new_callable=AsyncMock, side_effect=mock_get_products)
 def test_scrape_prices(mock_get):
-    response = client.get("/scrape-prices?category_url=https://fakeurl.com")
+    response = client.post("/scrape-prices", json={"query": "wheelchair"})
     assert response.status_code == 200
     data = response.json()
     assert "products" in data
@@ -145,6 +145,9 @@ def test_chat_history_nonexistent_session():
     data = response.json()
     assert data["session_id"] == "nonexistent_session"
     assert data["history"] == []
+    # Reading history must not create a session for the unknown id
+    from app.core.conversation_memory import conversation_memory
+    assert "nonexistent_session" not in conversation_memory.active_sessions
 
 def test_chat_context_inclusion():
     """Test that chat context is included in LLM calls for non-product queries"""
@@ -208,4 +211,44 @@ def test_doctor_knowledge_response():
     data = response.json()
     assert "headache" in data["reply"].lower()
     # Check for disclaimer or safety language
-    assert ("consult" in data["reply"].lower() or "doctor" in data["reply"].lower() or "healthcare professional" in data["reply"].lower()) 
\ No newline at end of file
+    assert ("consult" in data["reply"].lower() or "doctor" in data["reply"].lower() or "healthcare professional" in data["reply"].lower()) 
+
+
+def test_chat_history_limit_param():
+    """Test that ?limit=N returns only the last N turns, each pairing the user message with its reply"""
+    from app.core.conversation_memory import conversation_memory
+    session_id = "test_history_limit_444"
+    conversation_memory.clear_session(session_id)
+    for i in range(4):
+        conversation_memory.add_message(session_id, "user", f"Message {i}")
+        conversation_memory.add_message(session_id, "assistant", f"Reply {i}", "sales")
+    
+    response = client.get(f"/chat-history/{session_id}", params={"limit": 2})
+    assert response.status_code == 200
+    history = response.json()["history"]
+    assert [turn["user"] for turn in history] == ["Message 2", "Message 3"]
+    assert history[-1]["assistant"] == "Reply 3"
+    assert history[-1]["agent_type"] == "sales"
+    conversation_memory.clear_session(session_id)
+
+
+def test_chat_history_limit_all():
+    """Test that ?limit=all returns every turn, including a greeting with no user message"""
+    from app.core.conversation_memory import conversation_memory
+    session_id = "test_history_all_555"
+    conversation_memory.clear_session(session_id)
+    conversation_memory.add_message(session_id, "assistant", "Welcome!", "general")
+    for i in range(12):
+        conversation_memory.add_message(session_id, "user", f"Message {i}")
+        if i != 11:
+            conversation_memory.add_message(session_id, "assistant", f"Reply {i}", "sales")
+    
+    history = client.get(f"/chat-history/{session_id}", params={"limit": "all"}).json()["history"]
+    assert len(history) == 13
+    assert history[0]["user"] is None and history[0]["assistant"] == "Welcome!"
+    assert history[-1]["user"] == "Message 11" and history[-1]["assistant"] is None
+    
+    history = client.get(f"/chat-history/{session_id}", params={"limit": 3}).json()["history"]
+    assert [turn["user"] for turn in history] == ["Message 9", "Message 10", "Message 11"]
+    assert client.get(f"/chat-history/{session_id}", params={"limit": "some"}).status_code == 400
+    conversation_memory.clear_session(session_id)
@@ -2,7 +2,9 @@
 Tests for the scraping functionality.
 """
 
+import httpx
 import pytest
+from unittest.mock import MagicMock
 from app.core.scraping import get_product_prices_from_search, ProductScraper
 
 def test_scraper_initialization():
@@ -34,6 +36,208 @@ def test_price_parsing():
     assert scraper.parse_price("") is None
     assert scraper.parse_price("N/A") is None
 
+def test_parse_products_skips_non_product_items():
+    """Test that navigation/account links are not parsed as products."""
+    from bs4 import BeautifulSoup
+    
+    html = """
+    <ol>
+      <li class="product-item">
+        <div class="product-item-name"><a href="/default/wheelchair-1.html">Sunrise Light Wheelchair</a></div>
+        <span class="price">150.000 KWD</span>
+      </li>
+      <li class="product-item">
+        <div class="product-item-name"><a href="/default/downloadable">My Downloadable Products</a></div>
+      </li>
+    </ol>
+    """
+    scraper = ProductScraper(enable_llm_filtering=False)
+    products = scraper.parse_products(BeautifulSoup(html, "html.parser"))
+    
+    assert len(products) == 1
+    assert products[0]["name"] == "Sunrise Light Wheelchair"
+    assert products[0]["price"] == 150.0
+    assert products[0]["url"] == "https://www.alessaonline.com/default/wheelchair-1.html"
+
+def test_fallback_selector_does_not_outrank_primary():
+    """Test that a fallback selector matched on one page isn't preferred on the next."""
+    from bs4 import BeautifulSoup
+    
+    odd_page = """
+    <ol><li class="product-item">
+      <h3><a href="/default/chair-1.html">Drive Folding Wheelchair</a></h3>
+      <span class="price">80.000 KWD</span>
+    </li></ol>
+    """
+    normal_page = """
+    <ol><li class="product-item">
+      <h3><a href="/default/promo.html">Summer Offer</a></h3>
+      <div class="product-item-name"><a href="/default/chair-2.html">Sunrise Light Wheelchair</a></div>
+      <div class="price-box"><span class="price">150.000 KWD</span></div>
+    </li></ol>
+    """
+    scraper = ProductScraper(enable_llm_filtering=False)
+    assert scraper.parse_products(BeautifulSoup(odd_page, "html.parser"))[0]["name"] == "Drive Folding Wheelchair"
+    
+    products = scraper.parse_products(BeautifulSoup(normal_page, "html.parser"))
+    assert products[0]["name"] == "Sunrise Light Wheelchair"
+    assert products[0]["url"] == "https://www.alessaonline.com/default/chair-2.html"
+
+def test_relevance_verdicts_are_cached():
+    """Test that repeated relevance checks for the same query/product skip the LLM."""
+    scraper = ProductScraper(enable_llm_filtering=True)
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock(message=MagicMock(content="RELEVANT"))]
+    scraper._openai_client = client
+    
+    product = {"name": "Sunrise Light Wheelchair", "price": 150.0, "url": "https://www.alessaonline.com/p/1"}
+    assert scraper.is_relevant_with_llm("Wheelchair", product) is True
+    assert scraper.is_relevant_with_llm("  wheelchair ", product) is True
+    assert client.chat.completions.create.call_count == 1
+
+def test_filter_and_format_uses_single_llm_call():
+    """Test that the fused filter+format path keeps only the indices returned by the LLM."""
+    scraper = ProductScraper(enable_llm_filtering=True)
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [
+        MagicMock(message=MagicMock(content='{"kept": [1, 7]}'))
+    ]
+    scraper._openai_client = client
+    
+    products = [
+        {"name": "Wheelchair Cushion", "price": 10.0, "url": "https://www.alessaonline.com/p/1"},
+        {"name": "Sunrise Light Wheelchair", "price": 150.0, "url": "https://www.alessaonline.com/p/2"},
+    ]
+    kept, reply = scraper.filter_and_format_with_llm("wheelchair", products)
+    
+    assert kept == [products[1]]
+    assert "1. **Sunrise Light Wheelchair** - 150.0 KWD" in reply
+    assert "Cushion" not in reply
+    assert client.chat.completions.create.call_count == 1
+    # Verdicts from the fused call are reused by the per-product path
+    assert scraper.is_relevant_with_llm("wheelchair", products[0]) is False
+    assert client.chat.completions.create.call_count == 1
+
+def test_rule_relevance_skips_llm_for_obvious_matches():
+    """Test that products matching every query term are kept without an LLM call."""
+    scraper = ProductScraper(enable_llm_filtering=True)
+    scraper._openai_client = MagicMock()
+
+    match = {"name": "Drive Folding Wheelchairs", "price": 80.0, "url": "https://www.alessaonline.com/p/1"}
+    accessory = {"name": "Wheelchair Cushion", "price": 10.0, "url": "https://www.alessaonline.com/p/2"}
+    unrelated = {"name": "Digital Thermometer", "price": 5.0, "url": "https://www.alessaonline.com/p/3"}
+
+    assert scraper._rule_relevance("cheap wheelchair under 100 KWD", match) is True
+    assert scraper._rule_relevance("wheelchair", accessory) is None
+    assert scraper._rule_relevance("wheelchair", unrelated) is None
+    assert scraper._rule_relevance("wheelchair cushion", accessory) is True
+    assert scraper._split_by_rules("wheelchair", [match, accessory, unrelated]) == ([0], [1, 2])
+    scraper._openai_client.chat.completions.create.assert_not_called()
+
+def test_format_products_renders_template_without_llm():
+    """Test that the product reply is rendered locally, capped at ten products."""
+    scraper = ProductScraper(enable_llm_filtering=True)
+    scraper._openai_client = MagicMock()
+
+    products = [
+        {"name": f"Wheelchair {i}", "price": 100.0 + i, "url": f"https://www.alessaonline.com/p/{i}"}
+        for i in range(12)
+    ]
+    reply = scraper.format_products("wheelchair", products)
+
+    assert reply.startswith("I found 12 relevant products for 'wheelchair':")
+    assert "1. **Wheelchair 0** - 100.0 KWD\n   [View Product](https://www.alessaonline.com/p/0)" in reply
+    assert "10. **Wheelchair 9**" in reply
+    assert "Wheelchair 10" not in reply
+    assert "... and 2 more products available." in reply
+    assert scraper.format_products("wheelchair", []) == "No products found matching your search criteria."
+    scraper._openai_client.chat.completions.create.assert_not_called()
+
+def test_fetch_page_caches_and_revalidates():
+    """Test that fresh pages skip the network and stale ones are revalidated with their ETag."""
+    scraper = ProductScraper(enable_llm_filtering=False)
+    url = "https://www.alessaonline.com/default/catalogsearch/result/?q=wheelchair"
+    request = httpx.Request("GET", url)
+    scraper.client = MagicMock()
+    scraper.client.get.return_value = httpx.Response(
+        200, text="<html><p>cached</p></html>", headers={"ETag": '"v1"', "Cache-Control": "max-age=60"},
+        request=request
+    )
+
+    assert scraper.fetch_page(url).p.text == "cached"
+    assert scraper.fetch_page(url).p.text == "cached"
+    assert scraper.client.get.call_count == 1
+
+    scraper._page_cache[url].expires_at = 0
+    scraper.client.get.return_value = httpx.Response(304, request=request)
+    assert scraper.fetch_page(url).p.text == "cached"
+    _, kwargs = scraper.client.get.call_args
+    assert kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert scraper._page_cache[url].fresh
+
+def test_search_results_are_memoized(monkeypatch):
+    """Test that repeated searches for the same normalized query scrape once."""
+    from app.core import scraping
+    scraping._search_cache.clear()
+    search = MagicMock(return_value={"products": [{"name": "Sunrise Light Wheelchair"}], "formatted_reply": ""})
+    monkeypatch.setattr(scraping._scraper, "search_products", search)
+
+    first = get_product_prices_from_search("Wheelchair")
+    assert get_product_prices_from_search("  wheelchair ") is first
+    assert search.call_count == 1
+    scraping._search_cache.clear()
+
+def test_concurrent_identical_searches_share_one_scrape(monkeypatch):
+    """Test that overlapping searches for the same query wait on a single scrape."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from app.core import scraping
+    scraping._search_cache.clear()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_search(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return {"products": [{"name": "Sunrise Light Wheelchair"}], "formatted_reply": ""}
+
+    search = MagicMock(side_effect=slow_search)
+    monkeypatch.setattr(scraping._scraper, "search_products", search)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(get_product_prices_from_search, "wheelchair") for _ in range(4)]
+        assert started.wait(5)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert search.call_count == 1
+    assert all(result is results[0] for result in results)
+    assert not scraping._inflight_searches
+    scraping._search_cache.clear()
+
+def test_concurrent_identical_async_searches_share_one_scrape(monkeypatch):
+    """Test that overlapping async searches for the same query await a single scrape."""
+    import asyncio
+    from unittest.mock import AsyncMock
+    from app.core import scraping
+    scraping._search_cache.clear()
+
+    async def slow_search(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return {"products": [{"name": "Sunrise Light Wheelchair"}], "formatted_reply": ""}
+
+    search = AsyncMock(side_effect=slow_search)
+    monkeypatch.setattr(scraping._scraper, "asearch_products", search)
+
+    async def run():
+        return await asyncio.gather(*[scraping.aget_product_prices_from_search("wheelchair") for _ in range(4)])
+
+    results = asyncio.run(run())
+    assert search.call_count == 1
+    assert all(result is results[0] for result in results)
+    assert not scraping._ainflight_searches
+    scraping._search_cache.clear()
+
 def test_real_wheelchair_search():
     """Test that wheelchair search returns real products."""
     result = get_product_prices_from_search("wheelchair")
@@ -128,4 +332,24 @@ def test_product_search_tool():
         assert "price" in product
         assert "url" in product
         assert product["name"] != ""
-        assert product["price"] > 0
\ No newline at end of file
+        assert product["price"] > 0
+def test_async_searches_reuse_one_http_client():
+    """Test that async searches on one event loop share the scraper's HTTP client until it is closed."""
+    import asyncio
+    scraper = ProductScraper(enable_llm_filtering=False)
+    clients = []
+    
+    async def fake_fetch(client, url):
+        clients.append(client)
+        return None
+    scraper.afetch_page = fake_fetch
+    
+    async def run():
+        await scraper.asearch_products("wheelchair", max_pages=2)
+        await scraper.asearch_products("walker")
+        await scraper.aclose()
+    
+    asyncio.run(run())
+    assert len(clients) == 3
+    assert clients[0] is clients[1] is clients[2]
+    assert clients[0].is_closed
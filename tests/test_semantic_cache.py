@@ -0,0 +1,46 @@
+"""
+Tests for the semantic (near-duplicate) query cache.
+"""
+
+from app.core.semantic_cache import SemanticCache
+
+def test_near_duplicate_query_hits():
+    """Test that a rephrased query is served from the cache."""
+    cache = SemanticCache()
+    cache.set("sunrise folding wheelchair under 100 KWD", {"product_type": "wheelchair"})
+
+    assert cache.get("Sunrise folding wheelchairs under 100 kwd") == {"product_type": "wheelchair"}
+    assert cache.get("the sunrise folding wheelchair under 100 KWD") == {"product_type": "wheelchair"}
+
+def test_different_numbers_or_topics_miss():
+    """Test that price changes and unrelated queries are not treated as duplicates."""
+    cache = SemanticCache()
+    cache.set("sunrise folding wheelchair under 100 KWD", {"product_type": "wheelchair"})
+
+    assert cache.get("sunrise folding wheelchair under 200 KWD") is None
+    assert cache.get("blood pressure monitor") is None
+
+def test_direction_negation_and_extra_words_miss():
+    """Test that queries differing only in price direction, negation or a product word don't share answers."""
+    cache = SemanticCache()
+    cache.set("transport wheelchair under 100 kwd", "under")
+    cache.set("transport wheelchairs", "wheelchairs")
+    cache.set("wheelchair with cushion", "with")
+
+    assert cache.get("transport wheelchair over 100 kwd") is None
+    assert cache.get("transport wheelchair above 100 kwd") is None
+    assert cache.get("transport wheelchair cushions") is None
+    assert cache.get("wheelchair without cushion") is None
+    assert cache.get("wheelchair no cushion") is None
+    assert cache.get("the transport wheelchair under 100 KWD") == "under"
+
+def test_capacity_overwrites_oldest_entry():
+    """Test that a full cache evicts its oldest entry."""
+    cache = SemanticCache(capacity=2)
+    cache.set("wheelchair", 1)
+    cache.set("thermometer", 2)
+    cache.set("nebulizer", 3)
+
+    assert cache.get("wheelchair") is None
+    assert cache.get("thermometer") == 2
+    assert cache.get("nebulizer") == 3